@@ -5,7 +5,7 @@
 模块结构：
 - sites/: 所有支持的签到站点脚本（acfun, bilibili, pcbeta, right, smzdm, tieba, youdao）
 - core/: 核心功能模块（sign_executor, task_scheduler, credential_manager）
-- utils/: 工具模块（cookie_sync, notify, cookie_metadata, cookie_keepalive）
+- utils/: 工具模块（cookie_sync, notify, cookie_metadata, cookie_keepalive, http_session）
 """
 import threading
 import sys
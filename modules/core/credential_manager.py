@@ -5,7 +5,10 @@ credential_manager.py
 """
 
 import asyncio
+import heapq
+import time
 import uuid
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass, field
@@ -14,10 +17,29 @@ import logging
 import base64
 from io import BytesIO
 
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from playwright.async_api import Page, Browser, BrowserContext
+
+from .playwright_manager import get_playwright
 
 logger = logging.getLogger(__name__)
 
+# 无头登录浏览器的 Chromium 启动参数（关闭无用子系统，降低内存与启动耗时）
+_CHROMIUM_ARGS = [
+    "--no-sandbox",
+    "--no-zygote",
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-accelerated-2d-canvas",
+    "--disable-features=Translate,BackForwardCache",
+    "--disable-background-networking",
+    "--no-first-run",
+]
+
+# 提交登录后至少等待的秒数（给前端校验、弹出验证码留出时间）
+_SUBMIT_MIN_DELAY = 0.5
+# 提交登录后等待页面响应（URL 变化或提交按钮移除）的最长秒数
+_SUBMIT_WAIT_TIMEOUT = 2.0
+
 
 class LoginState(str, Enum):
     """登录状态"""
@@ -55,6 +77,7 @@ class LoginSession:
     username: str
     started_at: datetime
     expires_at: datetime
+    base_url: str = ""  # 登录页地址，用于限定提取 Cookie 的范围
     
     # Playwright 相关
     browser: Optional[Browser] = None
@@ -74,6 +97,17 @@ class LoginSession:
     
     # 结果
     cookies: Dict[str, str] = field(default_factory=dict)
+    
+    # 过期时间对应的单调时钟截止点（不受系统时间调整影响）
+    expires_deadline: float = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        remaining = (self.expires_at - datetime.now()).total_seconds()
+        self.expires_deadline = time.monotonic() + remaining
+    
+    def is_expired(self) -> bool:
+        """检查会话是否已过期"""
+        return time.monotonic() > self.expires_deadline
 
 
 class CredentialManager:
@@ -97,12 +131,19 @@ class CredentialManager:
         self.browser_manager = browser_manager
         self.sessions: Dict[str, LoginSession] = {}
         self.browser: Optional[Browser] = None
-        self._playwright_instance = None  # 保存 playwright 实例，防止资源泄露
+        self._playwright_instance = None  # 共享的 playwright 实例（由 playwright_manager 管理生命周期）
+        
+        # 会话过期小顶堆 (单调时钟截止点, session_id)，已提前清理的会话在弹出时跳过
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._expiry_task: Optional[asyncio.Task] = None
         
     async def init_browser(self):
         """初始化Playwright浏览器"""
-        self._playwright_instance = await async_playwright().start()
-        self.browser = await self._playwright_instance.chromium.launch(headless=True)
+        self._playwright_instance = await get_playwright()
+        self.browser = await self._playwright_instance.chromium.launch(
+            headless=True,
+            args=_CHROMIUM_ARGS
+        )
 
     # 兼容旧名称
     async def signup_browser(self):
@@ -110,12 +151,14 @@ class CredentialManager:
         
     async def cleanup_browser(self):
         """清理浏览器资源"""
+        if self._expiry_task:
+            self._expiry_task.cancel()
+            self._expiry_task = None
         if self.browser:
             await self.browser.close()
             self.browser = None
-        if self._playwright_instance:
-            await self._playwright_instance.stop()
-            self._playwright_instance = None
+        # Playwright 驱动为进程共享，这里只释放引用，由 stop_playwright() 统一停止
+        self._playwright_instance = None
     
     async def start_login(
         self,
@@ -151,19 +194,15 @@ class CredentialManager:
             site_name=site_name,
             username=username,
             started_at=datetime.now(),
-            expires_at=datetime.now() + timedelta(minutes=30)
+            expires_at=datetime.now() + timedelta(minutes=30),
+            base_url=base_url
         )
         
         try:
-            # 创建浏览器上下文和页面
-            session.context = await self.browser.new_context()
-            session.page = await session.context.new_page()
-            
-            # 设置viewport
-            await session.page.set_viewport_size({"width": 1280, "height": 720})
-            
-            # 保存会话
+            # 保存会话（浏览器上下文和页面在登录流程中创建，由上下文管理器负责释放）
             self.sessions[session_id] = session
+            heapq.heappush(self._expiry_heap, (session.expires_deadline, session_id))
+            self._ensure_expiry_task()
             
             # 异步启动登录流程
             asyncio.create_task(self._login_flow(session, base_url, username, password))
@@ -172,12 +211,45 @@ class CredentialManager:
             
         except Exception as e:
             session.state = LoginState.ERROR
-            session.error_message = f"启动浏览器失败: {str(e)}"
+            session.error_message = f"启动登录会话失败: {str(e)}"
             logger.error(f"启动登录会话失败: {str(e)}")
             raise
         
         return session
     
+    @asynccontextmanager
+    async def _session_resources(self, session: LoginSession):
+        """
+        管理会话的浏览器上下文和页面
+        
+        出现异常或被取消时一定释放；正常退出时，若会话仍在等待验证码输入则保留，
+        供 submit_captcha 继续使用，否则立即释放。
+        """
+        session.context = await self.browser.new_context(
+            viewport={"width": 1280, "height": 720},
+            service_workers="block"
+        )
+        try:
+            session.page = await session.context.new_page()
+            yield session.page
+        except BaseException:
+            await asyncio.shield(self._release_session_resources(session))
+            raise
+        else:
+            if session.state != LoginState.AWAITING_INPUT:
+                await asyncio.shield(self._release_session_resources(session))
+    
+    async def _release_session_resources(self, session: LoginSession):
+        """关闭会话的页面和浏览器上下文"""
+        if session.page:
+            with suppress(Exception):
+                await session.page.close()
+            session.page = None
+        if session.context:
+            with suppress(Exception):
+                await session.context.close()
+            session.context = None
+    
     async def _login_flow(
         self,
         session: LoginSession,
@@ -192,37 +264,40 @@ class CredentialManager:
             session.current_step = "navigating"
             session.state = LoginState.IN_PROGRESS
             
-            # 导航到登录页
-            logger.info(f"导航到: {base_url}")
-            await session.page.goto(base_url, wait_until="networkidle", timeout=30000)
-            await asyncio.sleep(1)  # 等待页面稳定
-            
-            session.current_step = "finding_login_form"
-            
-            # 查找登录表单并填充（这是通用逻辑，具体网站可能需要定制）
-            await self._fill_login_form(session, username, password)
-            
-            session.current_step = "checking_captcha"
-            
-            # 检测验证码
-            await self._check_for_captcha(session)
-            
-            if session.captcha_detected:
-                # 等待用户提交验证码
-                session.state = LoginState.AWAITING_INPUT
-                logger.info(f"检测到验证码，等待用户处理")
-                await asyncio.sleep(0.5)  # 短暂等待，避免busy loop
-                return
-            
-            # 继续登录流程
-            session.current_step = "submitting_login"
-            await self._wait_for_login_success(session)
-            
-            session.current_step = "extracting_cookies"
-            await self._extract_cookies(session)
-            
-            session.state = LoginState.SUCCESS
-            logger.info(f"登录成功: {session.site_name}")
+            async with self._session_resources(session) as page:
+                # 导航到登录页（外层 wait_for 保证驱动无响应时也能超时退出）
+                logger.info(f"导航到: {base_url}")
+                await asyncio.wait_for(
+                    page.goto(base_url, wait_until="networkidle", timeout=30000),
+                    timeout=35
+                )
+                await asyncio.sleep(1)  # 等待页面稳定
+                
+                session.current_step = "finding_login_form"
+                
+                # 查找登录表单并填充（这是通用逻辑，具体网站可能需要定制）
+                await self._fill_login_form(session, username, password)
+                
+                session.current_step = "checking_captcha"
+                
+                # 检测验证码
+                await self._check_for_captcha(session)
+                
+                if session.captcha_detected:
+                    # 等待用户提交验证码
+                    session.state = LoginState.AWAITING_INPUT
+                    logger.info(f"检测到验证码，等待用户处理")
+                    return
+                
+                # 继续登录流程
+                session.current_step = "submitting_login"
+                await self._wait_for_login_success(session)
+                
+                session.current_step = "extracting_cookies"
+                await self._extract_cookies(session)
+                
+                session.state = LoginState.SUCCESS
+                logger.info(f"登录成功: {session.site_name}")
             
         except asyncio.CancelledError:
             session.state = LoginState.CANCELLED
@@ -259,9 +334,9 @@ class CredentialManager:
             username_input = None
             for selector in username_selectors:
                 try:
-                    elements = await page.query_selector_all(selector)
-                    if elements:
-                        username_input = elements[0]
+                    locator = page.locator(selector).first
+                    if await locator.count():
+                        username_input = locator
                         break
                 except:
                     pass
@@ -284,9 +359,9 @@ class CredentialManager:
             password_input = None
             for selector in password_selectors:
                 try:
-                    elements = await page.query_selector_all(selector)
-                    if elements:
-                        password_input = elements[0]
+                    locator = page.locator(selector).first
+                    if await locator.count():
+                        password_input = locator
                         break
                 except:
                     pass
@@ -298,12 +373,40 @@ class CredentialManager:
                 await page.keyboard.press("tab")
                 await page.keyboard.type(password)
             
-            await asyncio.sleep(0.5)
-            
         except Exception as e:
             logger.error(f"填充登录表单失败: {str(e)}")
             raise
     
+    async def _wait_after_submit(self, page: Page, button, original_url: str):
+        """
+        等待提交后的页面响应
+
+        至少等待 _SUBMIT_MIN_DELAY 秒，之后 URL 变化或提交按钮从页面移除（表单被替换）即返回；
+        两者都未发生时最多等待 _SUBMIT_WAIT_TIMEOUT 秒（超时不视为错误）。
+        """
+        timeout_ms = _SUBMIT_WAIT_TIMEOUT * 1000
+        waiters = {asyncio.ensure_future(
+            page.wait_for_url(lambda url: url != original_url, timeout=timeout_ms)
+        )}
+        if button is not None:
+            waiters.add(asyncio.ensure_future(button.wait_for(state="detached", timeout=timeout_ms)))
+        deadline = time.monotonic() + _SUBMIT_WAIT_TIMEOUT
+        try:
+            await asyncio.sleep(_SUBMIT_MIN_DELAY)
+            while waiters:
+                done, waiters = await asyncio.wait(
+                    waiters,
+                    timeout=max(0, deadline - time.monotonic()),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                # 任一条件满足即返回；条件等待本身出错（含超时）时继续等其余条件
+                if not done or any(t.exception() is None for t in done):
+                    break
+        finally:
+            for t in waiters:
+                t.cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+    
     async def _check_for_captcha(self, session: LoginSession):
         """检测验证码"""
         page = session.page
@@ -405,8 +508,8 @@ class CredentialManager:
                 
                 for selector in selectors:
                     try:
-                        element = await page.query_selector(selector)
-                        if element:
+                        element = page.locator(selector).first
+                        if await element.count():
                             await element.fill(str(captcha_answer))
                             logger.info(f"填充文本验证码")
                             break
@@ -421,12 +524,12 @@ class CredentialManager:
                 logger.info(f"提交点击验证码坐标")
             
             elif session.captcha_info.captcha_type == CaptchaType.SLIDER:
-                # 滑块验证码
-                slider = await page.query_selector(".geetest_slider")
-                if slider:
+                # 滑块验证码：用鼠标 API 模拟拖动（产生 isTrusted 的可信事件，
+                # 页面内 dispatchEvent 派发的事件会被极验等滑块忽略）
+                slider = page.locator(".geetest_slider").first
+                if await slider.count():
                     box = await slider.bounding_box()
                     if box:
-                        # 模拟拖动
                         await page.mouse.move(box['x'] + 10, box['y'] + 10)
                         await page.mouse.down()
                         await page.mouse.move(
@@ -446,17 +549,20 @@ class CredentialManager:
                 "input[type='submit']",
             ]
             
+            original_url = page.url
+            submit_button = None
             for selector in submit_selectors:
                 try:
-                    button = await page.query_selector(selector)
-                    if button:
+                    button = page.locator(selector).first
+                    if await button.count():
                         await button.click()
+                        submit_button = button
                         logger.info(f"点击登录按钮")
                         break
                 except:
                     pass
             
-            await asyncio.sleep(2)
+            await self._wait_after_submit(page, submit_button, original_url)
             
             # 检查是否仍有验证码
             session.current_step = "checking_captcha"
@@ -475,12 +581,14 @@ class CredentialManager:
             await self._extract_cookies(session)
             
             session.state = LoginState.SUCCESS
+            await self._release_session_resources(session)
             return True
             
         except Exception as e:
             logger.error(f"提交验证码失败: {str(e)}", exc_info=True)
             session.state = LoginState.ERROR
             session.error_message = f"验证码提交失败: {str(e)}"
+            await self._release_session_resources(session)
             return False
     
     async def _wait_for_login_success(
@@ -510,9 +618,9 @@ class CredentialManager:
             "[class*='panel']",
         ]
         
-        start_time = datetime.now()
+        deadline = time.monotonic() + timeout
         
-        while (datetime.now() - start_time).seconds < timeout:
+        while time.monotonic() < deadline:
             try:
                 # 检查URL是否变化
                 if page.url != original_url and "login" not in page.url.lower():
@@ -539,14 +647,12 @@ class CredentialManager:
     
     async def _extract_cookies(self, session: LoginSession):
         """提取登录后的Cookie"""
-        page = session.page
-        
         try:
-            # 获取所有cookies
-            context_cookies = await session.context.cookies()
+            # 只获取目标站点相关的 cookies，避免序列化广告/统计等第三方域名的 Cookie
+            urls = [session.base_url] if session.base_url else []
+            context_cookies = await session.context.cookies(urls)
             
-            for cookie in context_cookies:
-                session.cookies[cookie['name']] = cookie['value']
+            session.cookies.update({c['name']: c['value'] for c in context_cookies})
             
             logger.info(f"提取了 {len(session.cookies)} 个Cookie")
             
@@ -565,7 +671,7 @@ class CredentialManager:
             }
         
         # 检查会话是否过期
-        if datetime.now() > session.expires_at:
+        if session.is_expired():
             session.state = LoginState.CANCELLED
             session.error_message = "会话已过期"
             await self.cleanup_session(session_id)
@@ -598,25 +704,35 @@ class CredentialManager:
         session = self.sessions.pop(session_id, None)
         
         if session:
-            try:
-                if session.page:
-                    await session.page.close()
-                if session.context:
-                    await session.context.close()
-            except Exception as e:
-                logger.error(f"清理会话失败: {str(e)}")
-            
+            await self._release_session_resources(session)
             logger.info(f"会话已清理: {session_id}")
     
     async def cleanup_expired_sessions(self):
-        """清理过期会话"""
-        expired_ids = [
-            session_id for session_id, session in self.sessions.items()
-            if datetime.now() > session.expires_at
-        ]
-        
-        for session_id in expired_ids:
-            await self.cleanup_session(session_id)
-        
-        if expired_ids:
-            logger.info(f"清理了 {len(expired_ids)} 个过期会话")
+        """清理过期会话（只弹出堆顶已到期的条目）"""
+        now = time.monotonic()
+        expired_count = 0
+        
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, session_id = heapq.heappop(self._expiry_heap)
+            if session_id in self.sessions:
+                await self.cleanup_session(session_id)
+                expired_count += 1
+        
+        if expired_count:
+            logger.info(f"清理了 {expired_count} 个过期会话")
+    
+    def _ensure_expiry_task(self):
+        """确保后台过期清理任务在运行（只启动一次）"""
+        if self._expiry_task is None or self._expiry_task.done():
+            self._expiry_task = asyncio.create_task(self._expiry_loop())
+    
+    async def _expiry_loop(self):
+        """后台过期清理循环：睡眠到最近一个会话到期，堆为空时退出"""
+        while self._expiry_heap:
+            delay = self._expiry_heap[0][0] - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(min(delay, 60))
+            try:
+                await self.cleanup_expired_sessions()
+            except Exception as e:
+                logger.error(f"清理过期会话失败: {str(e)}")
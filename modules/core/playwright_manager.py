@@ -0,0 +1,49 @@
+"""
+playwright_manager.py
+
+进程级 Playwright 驱动单例 - 所有异步浏览器功能共享同一个 Node 驱动进程。
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_playwright = None
+# asyncio.Lock 必须在事件循环内创建，延迟到首次调用时赋值
+_playwright_lock: Optional[asyncio.Lock] = None
+
+
+async def get_playwright():
+    """
+    获取共享的 Playwright 实例（首次调用时启动驱动）
+
+    必须始终在同一个事件循环中调用（Web 服务的后台事件循环）。
+
+    Returns:
+        Playwright 实例
+    """
+    global _playwright, _playwright_lock
+    if _playwright_lock is None:
+        _playwright_lock = asyncio.Lock()
+    async with _playwright_lock:
+        if _playwright is None:
+            from playwright.async_api import async_playwright
+            _playwright = await async_playwright().start()
+            logger.info("Playwright 驱动已启动")
+        return _playwright
+
+
+async def stop_playwright():
+    """停止共享的 Playwright 驱动（服务关闭时调用）"""
+    global _playwright
+    if _playwright is None:
+        return
+    try:
+        await _playwright.stop()
+        logger.info("Playwright 驱动已停止")
+    except Exception as e:
+        logger.warning(f"停止 Playwright 驱动失败: {str(e)}")
+    finally:
+        _playwright = None
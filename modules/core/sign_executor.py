@@ -4,21 +4,49 @@ sign_executor.py
 签到执行器 - 负责执行签到任务，调用各网站的签到模块。
 """
 
+import asyncio
 import importlib
+import importlib.util
 import logging
-from typing import Dict, Optional
+import re
+import sys
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, Optional
 from datetime import datetime
 
 from .task_scheduler import Task, TaskStatus
+from modules.utils.cookie_sync import load_config
 
 # 通知推送
 try:
-    from modules.utils.notify import push_notification
+    from modules.utils.notify import push_notification, flush_notifications
 except ImportError:
     push_notification = None
+    flush_notifications = None
 
 logger = logging.getLogger(__name__)
 
+CONFIG_PATH = 'config/config.yaml'
+SITES_PACKAGE = 'modules.sites'
+
+# 错误类型识别表（按优先级排列，命中第一条即返回）
+_ERROR_TYPE_PATTERNS = (
+    (re.compile(r'cookie|403', re.I), 'cookie_expired'),
+    (re.compile(r'timeout|timed out|connection', re.I), 'network_error'),
+    (re.compile(r'login|401', re.I), 'login_failed'),
+)
+# 错误通知中的"Cookie已失效"判定：只看 Cookie 字样（HTTP 403 可能是风控/限流，不据此提示重新登录）
+_COOKIE_ERROR_RE = re.compile(r'[Cc]ookie')
+
+
+def _classify_error(error_msg: str) -> str:
+    """根据错误消息识别错误类型"""
+    for pattern, error_type in _ERROR_TYPE_PATTERNS:
+        if pattern.search(error_msg):
+            return error_type
+    return 'unknown'
+
 
 class SignExecutionError(Exception):
     """签到执行异常"""
@@ -54,13 +82,13 @@ class SignExecutor:
         """
         self.notify_manager = notify_manager
         self.result_recorder = result_recorder
-        self.module_cache = {}  # 模块缓存
     
     async def execute_sign(
         self,
         task: Task,
         site_config: Dict,
-        cookies: Optional[str] = None
+        cookies: Optional[str] = None,
+        executor: Optional[Executor] = None
     ) -> str:
         """
         执行签到任务
@@ -69,6 +97,7 @@ class SignExecutor:
             task: 任务对象
             site_config: 网站配置
             cookies: Cookie字符串
+            executor: 运行阻塞 sign_in() 的线程池（省略时使用事件循环的默认线程池）
             
         Returns:
             str: 签到结果消息
@@ -100,8 +129,7 @@ class SignExecutor:
                 )
             
             # 加载全局配置
-            from modules.utils.cookie_sync import load_config
-            global_config, _ = load_config()
+            global_config, _ = load_config(CONFIG_PATH)
             
             # 创建通知函数，捕获详细消息
             captured_messages = []
@@ -110,12 +138,16 @@ class SignExecutor:
                 logger.info(f"[NOTIFY] [{site_name}] {message}")
                 captured_messages.append(message)
             
-            # 执行签到 - sign_in()是同步函数，不需要await
+            # 执行签到 - sign_in()是阻塞的同步函数，放到线程池中执行，避免阻塞事件循环
             logger.info(f"执行签到: {task.site_name}")
-            result = sign_func(
-                site=site_config,
-                config=global_config,
-                notify_func=notify_func
+            result = await asyncio.get_running_loop().run_in_executor(
+                executor,
+                partial(
+                    sign_func,
+                    site=site_config,
+                    config=global_config,
+                    notify_func=notify_func
+                )
             )
             
             # 处理返回值 - sign_in() 返回布尔值
@@ -130,7 +162,7 @@ class SignExecutor:
             if is_success:
                 logger.info(f"签到成功: {task.site_name} - {message}")
                 try:
-                    await self._send_notification(
+                    self._enqueue_notification(
                         site_name=task.site_name,
                         status="success",
                         message=message
@@ -154,7 +186,7 @@ class SignExecutor:
             logger.error(f"签到执行异常: {task.site_name} - {error_msg}", exc_info=True)
             
             try:
-                await self._send_notification(
+                self._enqueue_notification(
                     site_name=task.site_name,
                     status="failed",
                     message=error_msg
@@ -163,13 +195,7 @@ class SignExecutor:
                 logger.warning(f"发送异常通知失败: {notif_err}")
             
             # 分析错误类型并记录
-            error_type = 'unknown'
-            if 'cookie' in error_msg.lower() or '403' in error_msg:
-                error_type = 'cookie_expired'
-            elif 'timeout' in error_msg.lower() or 'connection' in error_msg.lower():
-                error_type = 'network_error'
-            elif 'login' in error_msg.lower() or '401' in error_msg:
-                error_type = 'login_failed'
+            error_type = _classify_error(error_msg)
             
             # 记录失败结果
             if self.result_recorder:
@@ -193,36 +219,72 @@ class SignExecutor:
         Raises:
             ModuleNotFoundError: 模块不存在
         """
-        if module_name in self.module_cache:
-            return self.module_cache[module_name]
-        
+        full_name = f'{SITES_PACKAGE}.{module_name}'
+        first_load = full_name not in sys.modules
         try:
-            # 动态加载站点脚本（从modules.sites中）
-            module = importlib.import_module(f'modules.sites.{module_name}')
-            self.module_cache[module_name] = module
-            logger.debug(f"加载模块: {module_name}")
+            # 动态加载站点脚本（从modules.sites中）；已导入的模块由 import_module 直接从
+            # sys.modules 返回，其它线程（如 preload）正在导入时会等待其初始化完成
+            module = importlib.import_module(full_name)
+            if first_load:
+                logger.debug(f"加载模块: {module_name}")
             return module
         except ImportError as e:
             raise SignModuleNotFoundError(f"模块 {module_name} 不存在: {str(e)}")
     
-    async def _send_notification(
+    async def preload(self, module_names: Iterable[str]):
+        """
+        预加载签到模块
+        
+        在服务启动时并行导入所有站点模块，使首次签到不再承担导入开销。
+        单个模块加载失败只记录警告，不影响其他模块。
+        
+        Args:
+            module_names: 模块名称列表
+        """
+        names = []
+        for name in dict.fromkeys(module_names):
+            if not name:
+                continue
+            # 先用 find_spec 排除不存在的模块，无需付出导入开销
+            if importlib.util.find_spec(f'{SITES_PACKAGE}.{name}') is None:
+                logger.warning(f"预加载跳过不存在的模块: {name}")
+                continue
+            names.append(name)
+        
+        results = await asyncio.gather(
+            *[asyncio.to_thread(self._get_module, n) for n in names],
+            return_exceptions=True
+        )
+        loaded = 0
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.warning(f"预加载模块失败: {name} - {result}")
+            else:
+                loaded += 1
+        logger.info(f"已预加载 {loaded} 个签到模块")
+    
+    def _enqueue_notification(
         self,
         site_name: str,
         status: str,
         message: str
     ):
-        """发送通知"""
+        """发送通知（push_notification 只入队，由 notify 模块的后台线程推送）"""
         if not push_notification:
             return
         try:
-            from modules.utils.cookie_sync import load_config
-            config, _ = load_config('config/config.yaml')
+            config, _ = load_config(CONFIG_PATH)
             icon = '✓' if status == 'success' else '✗'
             result_msg = f"{icon} {message}"
             push_notification(config, site_name, result_msg)
         except Exception as e:
             logger.warning(f"发送通知失败: {str(e)}")
     
+    async def aclose(self):
+        """等待队列中的通知发送完毕（最多 NOTIFY_FLUSH_TIMEOUT 秒），然后停止推送线程"""
+        if flush_notifications:
+            await asyncio.to_thread(flush_notifications)
+    
     async def handle_execution_error(
         self,
         task: Task,
@@ -242,19 +304,19 @@ class SignExecutor:
         
         # 分析错误类型
         if isinstance(error, SignModuleNotFoundError):
-            await self._send_notification(
+            self._enqueue_notification(
                 site_name=task.site_name,
                 status="error",
                 message=f"模块未找到: {error_msg}"
             )
-        elif "Cookie" in error_msg or "cookie" in error_msg:
-            await self._send_notification(
+        elif _COOKIE_ERROR_RE.search(error_msg):
+            self._enqueue_notification(
                 site_name=task.site_name,
                 status="error",
                 message="Cookie已失效，请重新登录"
             )
         else:
-            await self._send_notification(
+            self._enqueue_notification(
                 site_name=task.site_name,
                 status="error",
                 message=f"签到异常: {error_msg}"
@@ -278,12 +340,22 @@ class AsyncSignExecutor:
         """
         self.sign_executor = sign_executor
         self.max_concurrent = max_concurrent
+        # 与并发数一致的线程池，承载本执行器发起的阻塞 sign_in() 调用，避免线程无限增长；
+        # 只在自己的调用处显式传入，不替换事件循环的默认线程池
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent,
+            thread_name_prefix="SignWorker"
+        )
+    
+    async def aclose(self):
+        """关闭签到线程池（等待已提交的 sign_in() 执行完毕，不阻塞事件循环）"""
+        await asyncio.to_thread(self._executor.shutdown, wait=True)
     
     async def execute_batch(
         self,
         tasks: list,
         sites_config: Dict
-    ) -> Dict[str, bool]:
+    ) -> Dict[int, bool]:
         """
         批量执行签到任务
         
@@ -292,33 +364,35 @@ class AsyncSignExecutor:
             sites_config: 所有网站配置
             
         Returns:
-            {task_id: 是否成功} 的字典
+            {task_id（整数）: 是否成功} 的字典
         """
-        import asyncio
-        
-        results = {}
         semaphore = asyncio.Semaphore(self.max_concurrent)
+        # 预先解析每个任务对应的网站配置，避免在协程内重复查找
+        by_id = {t.task_id: sites_config.get(t.site_name, {}) for t in tasks}
         
         async def sign_with_semaphore(task: Task):
             async with semaphore:
-                try:
-                    site_config = sites_config.get(task.site_name, {})
-                    cookies = site_config.get('cookie')
-                    
-                    await self.sign_executor.execute_sign(
-                        task=task,
-                        site_config=site_config,
-                        cookies=cookies
-                    )
-                    
-                    results[task.task_id] = True
-                    return True
-                except Exception as e:
-                    logger.error(f"批量签到失败: {task.site_name} - {str(e)}")
-                    results[task.task_id] = False
-                    return False
+                site_config = by_id[task.task_id]
+                await self.sign_executor.execute_sign(
+                    task=task,
+                    site_config=site_config,
+                    cookies=site_config.get('cookie'),
+                    executor=self._executor
+                )
+                return task.task_id, True
         
-        # 并发执行
-        await asyncio.gather(*[sign_with_semaphore(t) for t in tasks])
+        # 并发执行，异常作为结果返回，不会中断其他任务
+        outcomes = await asyncio.gather(
+            *[sign_with_semaphore(t) for t in tasks],
+            return_exceptions=True
+        )
+        
+        results = {}
+        for task, outcome in zip(tasks, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"批量签到失败: {task.site_name} - {str(outcome)}")
+                results[task.task_id] = False
+            else:
+                results[task.task_id] = outcome[1]
         
         return results
@@ -4,12 +4,16 @@ task_scheduler.py
 任务调度器 - 负责生成每日签到任务和保活任务，管理任务队列和重试。
 """
 
-import uuid
+import heapq
+import itertools
 import logging
-from datetime import datetime, timedelta, time
-from typing import Dict, List, Optional
-from dataclasses import dataclass, field
+import threading
+from collections import defaultdict, deque
+from datetime import date, datetime, timedelta, time
+from typing import Deque, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field, fields
 from enum import Enum
+from functools import lru_cache
 import random
 
 logger = logging.getLogger(__name__)
@@ -30,10 +34,39 @@ class TaskStatus(str, Enum):
     SKIPPED = "skipped"
 
 
+@lru_cache(maxsize=128)
+def parse_run_time(value) -> Optional[time]:
+    """
+    解析 "HH:MM:SS" 格式的 run_time（按字符串缓存解析结果）
+
+    手动拆分比 strptime 快得多；格式无效时返回 None，由调用方决定默认值。
+    """
+    try:
+        hour, minute, second = value.split(':')
+        return time(int(hour), int(minute), int(second))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _with_slots(cls):
+    """
+    为 dataclass 重建带 __slots__ 的类（等价于 Python 3.10+ 的 dataclass(slots=True)）
+
+    字段默认值已保存在生成的 __init__ 中，可以安全地从类属性中移除。
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    for name in field_names + ('__dict__', '__weakref__'):
+        cls_dict.pop(name, None)
+    cls_dict['__slots__'] = field_names
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
+@_with_slots
 @dataclass
 class Task:
     """任务对象"""
-    task_id: str
+    task_id: int
     site_name: str
     task_type: TaskType
     scheduled_time: datetime
@@ -52,6 +85,11 @@ class Task:
     error_message: Optional[str] = None
     result_message: Optional[str] = None
     
+    @property
+    def display_id(self) -> str:
+        """用于日志展示的任务ID（如 sign_65f0a1b20000），按需格式化"""
+        return f"{self.task_type.value}_{self.task_id:x}"
+    
     def is_overdue(self, now: datetime) -> bool:
         """检查任务是否过期（距离计划时间超过1小时）"""
         return (now - self.scheduled_time).total_seconds() > 3600
@@ -73,10 +111,23 @@ class TaskScheduler:
     """
     
     def __init__(self):
-        self.pending_tasks: List[Task] = []  # 待执行队列
-        self.running_tasks: Dict[str, Task] = {}  # 运行中任务
-        self.completed_tasks: List[Task] = []  # 已完成任务列表（最近100条）
-        self.retry_queue: List[Task] = []  # 重试队列
+        # 待执行队列与重试队列均为小顶堆，元素为 (计划时间, 序号, 任务)
+        # 序号保证计划时间相同时按入队顺序出队，且不会比较 Task 对象
+        self.pending_tasks: List[Tuple[datetime, int, Task]] = []  # 待执行队列
+        self.running_tasks: Dict[int, Task] = {}  # 运行中任务（以整数任务ID为键）
+        self.completed_tasks: Deque[Task] = deque(maxlen=100)  # 已完成任务列表（最近100条）
+        self.retry_queue: List[Tuple[datetime, int, Task]] = []  # 重试队列
+        self._seq = itertools.count()
+        # 任务ID计数器：以启动时间为种子，进程重启后也不会与旧ID重复
+        self._task_counter = itertools.count(int(datetime.now().timestamp()) << 16)
+        
+        # 按日期维护的完成计数 {日期: {"completed", "success", "failed"}}，统计时直接读取
+        self._daily_counters: Dict[date, Dict[str, int]] = defaultdict(
+            lambda: {"completed": 0, "success": 0, "failed": 0}
+        )
+        # 签到线程会并发调用 start_task / complete_task，
+        # 运行中任务与当日计数的读改写及统计读取都在此锁内进行
+        self._lock = threading.Lock()
         
     def generate_daily_tasks(self, sites_config: Dict) -> List[Task]:
         """
@@ -93,7 +144,7 @@ class TaskScheduler:
         
         for site_name, site_config in sites_config.items():
             if not site_config.get('enabled', True):
-                logger.debug(f"跳过已禁用网站: {site_name}")
+                logger.debug("跳过已禁用网站: %s", site_name)
                 continue
             
             # 生成签到任务
@@ -108,7 +159,7 @@ class TaskScheduler:
         # 按计划时间排序
         tasks.sort(key=lambda t: t.scheduled_time)
         
-        logger.info(f"生成了 {len(tasks)} 个每日任务")
+        logger.info("生成了 %d 个每日任务", len(tasks))
         return tasks
     
     def _create_sign_task(
@@ -121,9 +172,8 @@ class TaskScheduler:
         
         # 解析计划时间
         run_time_str = site_config.get('run_time', '09:00:00')
-        try:
-            run_time = datetime.strptime(run_time_str, '%H:%M:%S').time()
-        except ValueError:
+        run_time = parse_run_time(run_time_str)
+        if run_time is None:
             logger.warning(f"无效的run_time格式: {run_time_str}，使用默认09:00:00")
             run_time = time(9, 0, 0)
         
@@ -141,13 +191,13 @@ class TaskScheduler:
             scheduled += timedelta(minutes=random_minutes)
         
         task = Task(
-            task_id=f"sign_{uuid.uuid4().hex[:8]}",
+            task_id=self.new_task_id(),
             site_name=site_name,
             task_type=TaskType.SIGN,
             scheduled_time=scheduled
         )
         
-        logger.debug(f"创建签到任务: {site_name} @ {scheduled}")
+        logger.debug("创建签到任务: %s @ %s", site_name, scheduled)
         return task
     
     def _create_keepalive_task(
@@ -183,21 +233,41 @@ class TaskScheduler:
                 )
         
         task = Task(
-            task_id=f"ka_{uuid.uuid4().hex[:8]}",
+            task_id=self.new_task_id(),
             site_name=site_name,
             task_type=TaskType.KEEPALIVE,
             scheduled_time=scheduled,
             max_retries=1  # 保活用1次重试足够
         )
         
-        logger.debug(f"创建保活任务: {site_name} @ {scheduled}")
+        logger.debug("创建保活任务: %s @ %s", site_name, scheduled)
         return task
     
+    def new_task_id(self) -> int:
+        """生成任务ID（仅用于进程内标识，整数键的哈希与比较开销远小于字符串）"""
+        return next(self._task_counter)
+    
+    def _push(self, heap: List[Tuple[datetime, int, Task]], task: Task):
+        """按计划时间将任务压入堆"""
+        heapq.heappush(heap, (task.scheduled_time, next(self._seq), task))
+    
+    @staticmethod
+    def _pop_due(heap: List[Tuple[datetime, int, Task]], now: datetime) -> List[Task]:
+        """弹出堆中所有计划时间已到的任务"""
+        due = []
+        while heap and heap[0][0] <= now:
+            due.append(heapq.heappop(heap)[2])
+        return due
+    
+    def iter_pending_tasks(self):
+        """遍历待执行队列中的任务（无序）"""
+        return (entry[2] for entry in self.pending_tasks)
+    
     def add_pending_tasks(self, tasks: List[Task]):
         """添加任务到待执行队列"""
-        self.pending_tasks.extend(tasks)
-        self.pending_tasks.sort(key=lambda t: t.scheduled_time)
-        logger.info(f"添加 {len(tasks)} 个任务到队列，当前队列大小: {len(self.pending_tasks)}")
+        for task in tasks:
+            self._push(self.pending_tasks, task)
+        logger.info("添加 %d 个任务到队列，当前队列大小: %d", len(tasks), len(self.pending_tasks))
     
     def get_executable_tasks(self, now: datetime) -> List[Task]:
         """
@@ -209,117 +279,124 @@ class TaskScheduler:
         Returns:
             可执行的任务列表
         """
-        executable = []
-        remaining = []
-        
-        for task in self.pending_tasks:
-            if task.scheduled_time <= now:
-                executable.append(task)
-            else:
-                remaining.append(task)
-        
-        self.pending_tasks = remaining
+        executable = self._pop_due(self.pending_tasks, now)
         
         if executable:
-            logger.info(f"发现 {len(executable)} 个可执行的任务")
+            logger.info("发现 %d 个可执行的任务", len(executable))
         
         return executable
     
     def get_executable_retry_tasks(self, now: datetime) -> List[Task]:
         """获取需要重试的任务"""
-        executable = []
-        remaining = []
-        
-        for task in self.retry_queue:
-            if task.scheduled_time <= now:
-                executable.append(task)
-            else:
-                remaining.append(task)
-        
-        self.retry_queue = remaining
-        return executable
+        return self._pop_due(self.retry_queue, now)
     
-    def start_task(self, task: Task) -> bool:
-        """标记任务为运行中"""
+    def start_task(self, task: Task, now: Optional[datetime] = None) -> bool:
+        """
+        标记任务为运行中
+
+        Args:
+            task: 任务对象
+            now: 当前时间（调度循环传入本轮统一的时间，省略时取当前时间）
+        """
         task.status = TaskStatus.RUNNING
-        task.executed_at = datetime.now()
+        task.executed_at = now or datetime.now()
         task.attempts += 1
-        self.running_tasks[task.task_id] = task
-        logger.info(f"启动任务: {task.task_id} ({task.site_name}) [尝试 {task.attempts}/{task.max_retries + 1}]")
+        with self._lock:
+            self.running_tasks[task.task_id] = task
+        logger.info(
+            "启动任务: %s (%s) [尝试 %d/%d]",
+            task.display_id, task.site_name, task.attempts, task.max_retries + 1
+        )
         return True
     
     def complete_task(
         self,
         task: Task,
         success: bool = True,
-        message: str = None
+        message: str = None,
+        now: Optional[datetime] = None
     ):
-        """标记任务完成"""
-        task.completed_at = datetime.now()
+        """
+        标记任务完成
+
+        Args:
+            task: 任务对象
+            success: 是否成功
+            message: 结果消息
+            now: 完成时间（省略时取当前时间）
+        """
+        task.completed_at = now or datetime.now()
         task.result_message = message or ("成功" if success else "失败")
         
         if success:
             task.status = TaskStatus.SUCCESS
-            logger.info(f"任务完成: {task.task_id} ({task.site_name}) - 成功")
+            logger.info("任务完成: %s (%s) - 成功", task.display_id, task.site_name)
         else:
             task.status = TaskStatus.FAILED
             task.error_message = message or "未知错误"
-            logger.warning(f"任务失败: {task.task_id} ({task.site_name}) - {message}")
+            logger.warning(f"任务失败: {task.display_id} ({task.site_name}) - {message}")
             
             # 检查是否需要重试
             if task.should_retry():
-                self._schedule_retry(task)
-        
-        # 从运行队列移出
-        self.running_tasks.pop(task.task_id, None)
+                self._schedule_retry(task, task.completed_at)
         
-        # 保存到已完成列表（保留最近100条）
-        self.completed_tasks.append(task)
-        if len(self.completed_tasks) > 100:
-            self.completed_tasks.pop(0)
+        completed_date = task.completed_at.date()
+        with self._lock:
+            # 从运行队列移出
+            self.running_tasks.pop(task.task_id, None)
+            
+            # 保存到已完成列表（deque 自动淘汰最旧的记录，保留最近100条）
+            self.completed_tasks.append(task)
+            
+            # 更新当日计数
+            counters = self._daily_counters[completed_date]
+            counters["completed"] += 1
+            counters["success" if success else "failed"] += 1
+            
+            # 清理7天前的计数
+            if len(self._daily_counters) > 7:
+                cutoff = completed_date - timedelta(days=7)
+                for d in [d for d in self._daily_counters if d < cutoff]:
+                    del self._daily_counters[d]
     
-    def _schedule_retry(self, task: Task):
+    def _schedule_retry(self, task: Task, now: datetime):
         """安排任务重试"""
         # 延迟5分钟重试
-        task.scheduled_time = datetime.now() + timedelta(minutes=5)
-        self.retry_queue.append(task)
-        logger.info(f"任务已加入重试队列: {task.task_id} ({task.site_name})")
+        task.scheduled_time = now + timedelta(minutes=5)
+        self._push(self.retry_queue, task)
+        logger.info("任务已加入重试队列: %s (%s)", task.display_id, task.site_name)
     
-    def get_task_statistics(self) -> Dict:
-        """获取任务统计信息"""
-        today = datetime.now().date()
+    def get_task_statistics(self, now: Optional[datetime] = None) -> Dict:
+        """获取任务统计信息（当日计数在 complete_task 中累加，这里直接读取）"""
+        today_date = (now or datetime.now()).date()
+        with self._lock:
+            today = dict(self._daily_counters.get(today_date) or {})
+            running = list(self.running_tasks.values())
         return {
             "pending": len(self.pending_tasks),
-            "running": len(self.running_tasks),
+            "running": len(running),
+            # 每个运行中的签到任务一项（同一站点有多个任务时重复出现，与原先一致）
             "running_site_names": [
-                t.site_name for t in self.running_tasks.values()
-                if t.task_type.value == 'sign'
+                t.site_name for t in running if t.task_type == TaskType.SIGN
             ],
             "retry_queue": len(self.retry_queue),
-            "completed_today": len([
-                t for t in self.completed_tasks
-                if t.completed_at and t.completed_at.date() == today
-            ]),
-            "success_today": len([
-                t for t in self.completed_tasks
-                if t.completed_at and t.completed_at.date() == today
-                and t.status == TaskStatus.SUCCESS
-            ]),
-            "failed_today": len([
-                t for t in self.completed_tasks
-                if t.completed_at and t.completed_at.date() == today
-                and t.status == TaskStatus.FAILED
-            ]),
+            "completed_today": today.get("completed", 0),
+            "success_today": today.get("success", 0),
+            "failed_today": today.get("failed", 0),
         }
     
     def cleanup_overdue_tasks(self, now: datetime):
         """清理超期未执行的任务（超过1小时）"""
-        overdue = [t for t in self.pending_tasks if t.is_overdue(now)]
+        # 堆顶是计划时间最早的任务，超期任务一定集中在堆顶；
+        # 直接比较堆元素中的计划时间与截止时间，无需逐个调用 is_overdue
+        cutoff = now - timedelta(hours=1)
+        overdue = []
+        while self.pending_tasks and self.pending_tasks[0][0] < cutoff:
+            overdue.append(heapq.heappop(self.pending_tasks)[2])
         
         for task in overdue:
             task.status = TaskStatus.SKIPPED
             task.error_message = "任务超期被跳过"
-            self.pending_tasks.remove(task)
             self.completed_tasks.append(task)
         
         if overdue:
@@ -7,6 +7,7 @@
   1. 在 modules/sites/ 下新建对应 .py 文件（实现 sign(site, config, notify_func) 函数）
   2. 在下方 SITE_REGISTRY 中添加对应条目即可
 """
+from functools import lru_cache
 
 # ==================== 站点注册表（唯一权威来源）====================
 # key: 模块文件名（不含 .py 后缀），同时作为 config.yaml 中 site.module 字段的值
@@ -68,3 +69,18 @@ SITE_REGISTRY = {
         'description': '有道云笔记',
     },
 }
+
+
+@lru_cache(maxsize=64)
+def parse_cookie(raw):
+    """
+    解析 "k1=v1; k2=v2" 格式的 Cookie 字符串（按字符串缓存）
+
+    返回 (key, value) 元组以便缓存共享，调用方按需 dict(...) 转换。
+    """
+    pairs = []
+    for item in raw.split(';'):
+        if '=' in item:
+            k, v = item.strip().split('=', 1)
+            pairs.append((k, v))
+    return tuple(pairs)
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+签到结果 - 站点模块解析出的结构化结果及其通知文本格式化
+"""
+import io
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class SignResult:
+    """签到结果（解析与展示分离：站点只填字段，由 format_notify 统一生成文本）"""
+    status: str
+    today: Optional[str] = None
+    continuous_days: Optional[str] = None
+    total_days: Optional[str] = None
+    extra: List[str] = field(default_factory=list)
+
+
+# 字段 → 展示格式（按此顺序逐行输出）
+_FIELD_FORMAT = (
+    ('today', "今日积分：{}"),
+    ('continuous_days', "连续签到：{} 天"),
+    ('total_days', "总签到天数：{} 天"),
+)
+
+
+def format_details(result):
+    """签到详情文本（积分、天数及附加信息，每项一行；无详情时返回空串）"""
+    buf = io.StringIO()
+    for attr, fmt in _FIELD_FORMAT:
+        value = getattr(result, attr)
+        if value is not None:
+            if buf.tell():
+                buf.write("\n")
+            buf.write(fmt.format(value))
+    for line in result.extra:
+        if line:
+            if buf.tell():
+                buf.write("\n")
+            buf.write(line)
+    return buf.getvalue()
+
+
+def format_notify(result):
+    """通知文本：首行为签到状态，其后为签到详情"""
+    details = format_details(result)
+    return f"{result.status}\n{details}" if details else result.status
@@ -2,8 +2,11 @@
 """
 AcFun签到模块
 """
+import asyncio
 import requests
 from .. import safe_print, get_user_agent
+from ..utils.http_session import new_session
+from ._result import SignResult, format_notify
 
 
 def get_balance(session):
@@ -67,7 +70,7 @@ def sign_in(site, config, notify_func):
         'Cookie': cookie
     }
     
-    session = requests.Session()
+    session = new_session()
     session.headers.update(headers)
     
     try:
@@ -102,31 +105,29 @@ def sign_in(site, config, notify_func):
             
             # 检查返回结果
             result_code = result.get('result')
+            msg = result.get('msg') or ''
             
             if result_code == 0:
                 # 签到成功
                 award_coin = result.get('awardCoin', 0)
                 award_banana = result.get('awardBanana', 0)
                 
-                result_msg = f"签到成功\n奖励: {award_coin}金币, {award_banana}香蕉"
-                if balance_info:
-                    result_msg += f"\n{balance_info}"
+                result_msg = format_notify(SignResult(
+                    "签到成功",
+                    extra=[f"奖励: {award_coin}金币, {award_banana}香蕉", balance_info]
+                ))
                 
                 safe_print(f"[{name}] {result_msg}")
             
-            elif result_code == 1 or 'duplicate' in result.get('msg', '').lower() or '已' in result.get('msg', ''):
+            elif result_code == 1 or '已' in msg or 'duplicate' in msg.lower():
                 # 已经签到过
-                msg = result.get('msg', '今日已签到')
-                result_msg = f"{msg}"
-                if balance_info:
-                    result_msg += f"\n{balance_info}"
+                result_msg = format_notify(SignResult(msg or '今日已签到', extra=[balance_info]))
                 safe_print(f"[{name}] {result_msg}")
             
             else:
                 # 其他错误
-                msg = result.get('msg', '未知错误')
                 host_msg = result.get('host-msg', '')
-                error_info = f"{msg} {host_msg}".strip()
+                error_info = f"{msg or '未知错误'} {host_msg}".strip()
                 result_msg = f"签到失败: {error_info}"
                 safe_print(f"[{name}] {result_msg}")
         
@@ -134,7 +135,7 @@ def sign_in(site, config, notify_func):
             # 无法解析JSON
             result_msg = "签到失败: 返回数据格式异常"
             safe_print(f"[{name}] {result_msg}")
-            safe_print(f"[{name}] 响应内容: {signin_resp.text[:200]}")
+            safe_print(f"[{name}] 响应内容: {signin_resp.content[:200].decode('utf-8', errors='replace')}")
         
         notify_func(config, name, result_msg)
         return "失败" not in result_msg
@@ -176,13 +177,11 @@ async def sign(base_url, cookies, **kwargs):
             'Cookie': cookies
         }
         
-        session = requests.Session()
+        session = new_session()
         session.headers.update(headers)
         
-        # 运行在线程中执行（避免阻塞）
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
+        # 同步实现放到线程中执行，避免阻塞事件循环
+        result = await asyncio.to_thread(
             _sign_sync,
             session,
             base_url,
@@ -2,10 +2,13 @@
 """
 哔哩哔哩签到模块
 """
+import asyncio
 import re
 import time
+import traceback
 import requests
 from .. import safe_print, get_user_agent
+from ..utils.http_session import new_session
 
 
 def sign_in(site, config, notify_func):
@@ -41,7 +44,7 @@ def sign_in(site, config, notify_func):
         'Cookie': cookie
     }
     
-    session = requests.Session()
+    session = new_session()
     session.headers.update(headers)
     
     # 任务状态收集
@@ -234,7 +237,6 @@ def sign_in(site, config, notify_func):
     except Exception as e:
         result_msg = f"签到失败: {e}"
         safe_print(f"[{name}] {result_msg}")
-        import traceback
         traceback.print_exc()
         notify_func(config, name, result_msg)
         return False
@@ -257,9 +259,8 @@ async def sign(base_url, cookies, **kwargs):
         return "签到失败：缺少Cookie"
     
     try:
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
+        # 同步实现放到线程中执行，避免阻塞事件循环
+        result = await asyncio.to_thread(
             _sign_sync,
             cookies,
             base_url
@@ -278,7 +279,7 @@ def _sign_sync(cookies, base_url):
             'Cookie': cookies
         }
         
-        session = requests.Session()
+        session = new_session()
         session.headers.update(headers)
         
         # 获取视频列表
@@ -3,9 +3,71 @@
 远景论坛（PCBeta）签到模块 - 使用账号密码登录
 """
 import asyncio
-import requests
+import re
 import time
 from .. import safe_print, get_user_agent
+from ..utils.http_session import new_session
+
+LOGIN_URL = "https://i.pcbeta.com/member.php?mod=logging&action=login&loginsubmit=yes&inajax=1"
+TASK_APPLY_URL = "https://i.pcbeta.com/home.php?mod=task&do=apply&id=149"
+TASK_DRAW_URL = "https://i.pcbeta.com/home.php?mod=task&do=draw&id=149"
+CREDIT_URL = "https://i.pcbeta.com/home.php?mod=spacecp&ac=credit"
+
+# 积分页面解析用正则（模块加载时编译一次）
+_NICK_RE = re.compile(r'访问我的空间">(.+?)<')
+_PB_RE = re.compile(r'<em>\s*PB币([\s\S]+?)</ul>')
+_TAG_RE = re.compile(r'<[^>]+>')
+_FORMULA_RE = re.compile(r'\s*\([^)]*总积分[^)]*\)\s*')
+# 签到状态：分组1 = 本次完成，分组2 = 今日已完成
+_STATUS_RE = re.compile(r'(成功完成)|(不是进行中|已完成过)')
+
+
+def _parse_sign_status(result_text):
+    """根据任务领奖页面内容判断签到状态（单次扫描页面）"""
+    m = _STATUS_RE.search(result_text)
+    if not m:
+        return "签到完成"
+    return "签到成功" if m.group(1) else "今日已签到"
+
+
+def _has_auth_cookie(cookie_names):
+    """Discuz 登录成功后会下发 <前缀>_auth Cookie，据此判断登录状态"""
+    return any(n == 'auth' or n.endswith('_auth') for n in cookie_names)
+
+
+def _parse_credit_info(credit_html, username):
+    """从积分页面提取 "昵称 PB币..." 信息，未找到时返回 None"""
+    # 提取用户名
+    nickname_match = _NICK_RE.search(credit_html)
+    nickname = nickname_match.group(1) if nickname_match else username
+    
+    # 提取积分信息 (PB币部分)
+    pb_section = _PB_RE.search(credit_html)
+    if not pb_section:
+        return None
+    
+    pb_info = pb_section.group(0)
+    # 清理HTML标签
+    pb_clean = _TAG_RE.sub(' ', pb_info)
+    # 清理HTML实体
+    pb_clean = pb_clean.replace('&nbsp;', ' ').replace('&amp;', '&')
+    pb_clean = ' '.join(pb_clean.split())
+    
+    # 去掉公式部分（括号及其内容）
+    pb_clean = _FORMULA_RE.sub('', pb_clean)
+    
+    return f"{nickname} {pb_clean}"
+
+
+def _notify_result(name, config, notify_func, sign_status, info_msg):
+    """输出并推送签到结果"""
+    if info_msg:
+        safe_print(f"[{name}] ✓ {sign_status}")
+        safe_print(f"[{name}] {info_msg}")
+        notify_func(config, name, f"{sign_status}\n{info_msg}")
+    else:
+        safe_print(f"[{name}] ✓ {sign_status}（未获取到积分详情）")
+        notify_func(config, name, sign_status)
 
 
 def sign_in(site, config, notify_func):
@@ -28,19 +90,18 @@ def sign_in(site, config, notify_func):
     
     try:
         ua = get_user_agent(config)
-        session = requests.Session()
+        session = new_session()
         session.headers.update({"User-Agent": ua})
         
         safe_print(f"[{name}] 开始登录...")
         
         # 1. 登录
-        login_url = "https://i.pcbeta.com/member.php?mod=logging&action=login&loginsubmit=yes&inajax=1"
         login_data = {
             "username": username,
             "password": password
         }
         
-        res = session.post(login_url, data=login_data, timeout=20)
+        res = session.post(LOGIN_URL, data=login_data, timeout=20)
         
         # 检查登录是否成功
         if res.status_code != 200:
@@ -48,66 +109,32 @@ def sign_in(site, config, notify_func):
             notify_func(config, name, "登录失败")
             return False
         
-        # 简单判断登录状态（远景论坛登录成功会返回包含特定信息的响应）
-        if "欢迎" not in res.text and len(res.text) < 100:
-            # 可能登录成功但没有明确提示
-            pass
+        # 根据登录 Cookie 判断是否成功，无需扫描响应内容
+        if not _has_auth_cookie(session.cookies.keys()):
+            safe_print(f"[{name}] 登录失败：未获取到登录凭证，请检查账号密码")
+            notify_func(config, name, "登录失败")
+            return False
         
         safe_print(f"[{name}] 登录成功")
         
         # 2. 领取任务
         time.sleep(2)
-        task_apply_url = "https://i.pcbeta.com/home.php?mod=task&do=apply&id=149"
-        res = session.get(task_apply_url, timeout=20)
+        res = session.get(TASK_APPLY_URL, timeout=20)
         safe_print(f"[{name}] 已领取任务")
         
         # 3. 完成任务（签到）
         time.sleep(2)
-        task_draw_url = "https://i.pcbeta.com/home.php?mod=task&do=draw&id=149"
-        res = session.get(task_draw_url, timeout=20)
+        res = session.get(TASK_DRAW_URL, timeout=20)
         
         # 4. 检查结果
-        result_text = res.text
-        sign_status = ""
-        if "成功完成" in result_text:
-            sign_status = "签到成功"
-        elif "不是进行中" in result_text or "已完成过" in result_text:
-            sign_status = "今日已签到"
-        else:
-            sign_status = "签到完成"
+        sign_status = _parse_sign_status(res.text)
         
         # 5. 获取积分信息
         time.sleep(2)
-        credit_url = "https://i.pcbeta.com/home.php?mod=spacecp&ac=credit"
         try:
-            res_credit = session.get(credit_url, timeout=20)
-            credit_html = res_credit.text
-            
-            # 提取用户名
-            import re
-            nickname_match = re.search(r'访问我的空间">(.+?)<', credit_html)
-            nickname = nickname_match.group(1) if nickname_match else username
-            
-            # 提取积分信息 (PB币部分)
-            pb_section = re.search(r'<em>\s*PB币([\s\S]+?)</ul>', credit_html)
-            if pb_section:
-                pb_info = pb_section.group(0)
-                # 清理HTML标签
-                pb_clean = re.sub(r'<[^>]+>', ' ', pb_info)
-                # 清理HTML实体
-                pb_clean = pb_clean.replace('&nbsp;', ' ').replace('&amp;', '&')
-                pb_clean = ' '.join(pb_clean.split())
-                
-                # 去掉公式部分（括号及其内容）
-                pb_clean = re.sub(r'\s*\([^)]*总积分[^)]*\)\s*', '', pb_clean)
-                
-                info_msg = f"{nickname} {pb_clean}"
-                safe_print(f"[{name}] ✓ {sign_status}")
-                safe_print(f"[{name}] {info_msg}")
-                notify_func(config, name, f"{sign_status}\n{info_msg}")
-            else:
-                safe_print(f"[{name}] ✓ {sign_status}（未获取到积分详情）")
-                notify_func(config, name, sign_status)
+            res_credit = session.get(CREDIT_URL, timeout=20)
+            info_msg = _parse_credit_info(res_credit.text, username)
+            _notify_result(name, config, notify_func, sign_status, info_msg)
         except Exception as e:
             safe_print(f"[{name}] ✓ {sign_status}（获取积分信息失败: {e}）")
             notify_func(config, name, sign_status)
@@ -137,9 +164,8 @@ async def sign(base_url, cookies, **kwargs):
         return "签到失败：缺少Cookie"
     
     try:
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
+        # 同步实现放到线程中执行，避免阻塞事件循环
+        result = await asyncio.to_thread(
             _sign_sync,
             cookies,
             base_url
@@ -159,7 +185,7 @@ def _sign_sync(cookies, base_url):
             'Cookie': cookies
         }
         
-        session = requests.Session()
+        session = new_session()
         session.headers.update(headers)
         
         # 签到接口
@@ -4,20 +4,93 @@
 依赖CookieCloud同步浏览器Cookie（包含5秒盾验证Cookie）
 Cookie保活由 modules/cookie_keepalive.py 独立管理
 """
-import requests
+import asyncio
 import re
 import time
 from urllib.parse import urljoin
 from .. import safe_print, get_user_agent
+from . import parse_cookie
+from ._result import SignResult, format_details, format_notify
+from ..utils.http_session import new_session
+from ..utils.json_compat import loads as json_loads, JSONDecodeError
 
+# 页面解析用正则（模块加载时编译一次）
+# formhash 在首页原始 bytes 上匹配（无需解码整个页面）
+_FORMHASH_ANCHOR = b'formhash='
+_FORMHASH_CHARS = frozenset(b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+_FORMHASH_INPUT_RE = re.compile(rb'name=["\']formhash["\']\s+value=["\']([a-zA-Z0-9]+)["\']')
+# 签到接口路径（相对论坛根目录）
+_SIGN_PATH = "plugin.php?id=erling_qd:action&action=sign&inajax=1"
+# 签到信息：三类信息合并为一个模式，单次扫描后按命名分组区分（分组名即 SignResult 字段名）；
+# 全角冒号写成分组而非字符类，使同一模式也能编译为 bytes 版本直接匹配 UTF-8 原始响应
+_SIGN_INFO_PATTERN = (
+    r'(?P<today>今日积分(?::|：)\s*(\d+)|今日获得\s*(\d+)\s*积分|获得\s*(\d+)\s*积分)'
+    r'|(?P<continuous_days>连续签到(?::|：)\s*(\d+)\s*天|已连续签到\s*(\d+)\s*天)'
+    r'|(?P<total_days>总签到天数(?::|：)\s*(\d+)\s*天|累计签到\s*(\d+)\s*天)'
+)
+_SIGN_INFO_RE = re.compile(_SIGN_INFO_PATTERN)
+_SIGN_INFO_RE_B = re.compile(_SIGN_INFO_PATTERN.encode('utf-8'))
+# JSON 格式签到结果的字段 → SignResult 字段
+_JSON_INFO_FIELDS = (
+    ('credit', 'today'),
+    ('continuous_days', 'continuous_days'),
+    ('total_days', 'total_days'),
+)
+_SIGN_INFO_KINDS = 3
 
-def _is_login_required(text):
-    """判断响应是否表示未登录/登录失效"""
-    if not text:
+
+def _keyword_patterns(*keywords):
+    """
+    将关键词编译为忽略大小写的正则（避免对整页做 lower() 拷贝）
+
+    Returns:
+        (bytes 版本, 文本版本)：bytes 版本直接在 UTF-8 原始响应上查找
+    """
+    pattern = '|'.join(map(re.escape, keywords))
+    return (
+        re.compile(pattern.encode('utf-8'), re.IGNORECASE),
+        re.compile(pattern, re.IGNORECASE),
+    )
+
+
+# 关键词检测：英文关键词忽略大小写
+_LOGIN_REQUIRED_RE_B, _LOGIN_REQUIRED_RE = _keyword_patterns("先登录", "未登录", "登录后", "login")
+_LOGIN_PAGE_RE_B, _LOGIN_PAGE_RE = _keyword_patterns("登录", "login")
+_VERIFY_PAGE_RE_B, _VERIFY_PAGE_RE = _keyword_patterns("验证", "verify")
+
+# HTML 签到结果的状态判定（按顺序命中第一条）
+_SIGN_STATUS_KEYWORDS = (
+    (("成功",), "签到成功"),
+    (("已经", "已签"), "今日已签到"),
+    (("恭喜", "完成"), "签到完成"),
+)
+_SIGN_STATUS_KEYWORDS_B = tuple(
+    (tuple(k.encode('utf-8') for k in keywords), status)
+    for keywords, status in _SIGN_STATUS_KEYWORDS
+)
+
+
+def _is_login_required(data):
+    """判断响应是否表示未登录/登录失效（data 可以是文本或原始响应 bytes）"""
+    if not data:
         return False
-    lowered = str(text).lower()
-    keywords = ["请先登录", "先登录", "未登录", "登录后", "login"]
-    return any(keyword in lowered for keyword in keywords)
+    if not isinstance(data, bytes):
+        data = str(data)
+    return _contains_any(data, _LOGIN_REQUIRED_RE_B, _LOGIN_REQUIRED_RE)
+
+
+def _raw_or_text(res):
+    """UTF-8 响应直接返回原始 bytes 供关键词检测，其它编码回退到解码后的文本"""
+    if (res.encoding or '').lower() in ('utf-8', 'utf8'):
+        return res.content
+    return res.text
+
+
+def _contains_any(data, pattern_b, pattern):
+    """在 bytes 或文本中查找任一关键词（pattern_b / pattern 由 _keyword_patterns 生成）"""
+    if isinstance(data, bytes):
+        return pattern_b.search(data) is not None
+    return pattern.search(data) is not None
 
 
 def _has_auth_cookie(cookie_dict):
@@ -28,6 +101,93 @@ def _has_auth_cookie(cookie_dict):
     return False
 
 
+def _search_formhash(buf):
+    """
+    在原始 bytes 中查找 formhash（兼容 URL 参数与隐藏字段两种格式）
+
+    URL 参数格式是固定前缀，直接用 find 定位后逐字节扫描，
+    找不到时再用正则匹配隐藏字段。
+
+    Returns:
+        bytes 或 None（未找到）
+    """
+    n = len(buf)
+    i = buf.find(_FORMHASH_ANCHOR)
+    while i >= 0:
+        start = end = i + len(_FORMHASH_ANCHOR)
+        while end < n and buf[end] in _FORMHASH_CHARS:
+            end += 1
+        if end > start:
+            return buf[start:end]
+        i = buf.find(_FORMHASH_ANCHOR, start)
+    m = _FORMHASH_INPUT_RE.search(buf)
+    if m:
+        return m.group(1)
+    return None
+
+
+def _fetch_formhash(session, url):
+    """
+    获取首页并在原始 bytes 上查找 formhash
+
+    完整读取响应（首页不大），连接随即归还连接池，随后的签到 POST 可直接复用。
+
+    Returns:
+        (formhash, page): 找到时 page 为 None；未找到时 page 为完整页面
+        （UTF-8 页面为 bytes，其它编码为文本），供诊断使用
+    """
+    res = session.get(url, timeout=20, allow_redirects=True)
+    buf = res.content
+    fh = _search_formhash(buf)
+    if fh:
+        return fh.decode('ascii'), None
+    encoding = (res.encoding or 'utf-8').lower()
+    if encoding not in ('utf-8', 'utf8'):
+        return None, buf.decode(encoding, errors='replace')
+    return None, buf
+
+
+def _extract_sign_info(data):
+    """
+    从 HTML 格式的签到结果中提取今日积分、连续签到、总签到天数（每类取首个匹配）
+
+    data 可以是 UTF-8 原始响应 bytes 或解码后的文本。
+
+    Returns:
+        dict: SignResult 字段名 → 数值文本（仅包含命中的项）
+    """
+    pattern = _SIGN_INFO_RE_B if isinstance(data, bytes) else _SIGN_INFO_RE
+    found = {}
+    for m in pattern.finditer(data):
+        kind = m.lastgroup
+        if kind not in found:
+            # 命名分组内只有一个数字分组命中
+            value = next(g for g in m.groups() if g and g.isdigit())
+            found[kind] = value.decode('ascii') if isinstance(value, bytes) else value
+            if len(found) == _SIGN_INFO_KINDS:
+                break
+    return found
+
+
+def _classify_sign_status(data):
+    """根据 HTML 签到结果中的关键词判定签到状态（data 可以是 bytes 或文本）"""
+    table = _SIGN_STATUS_KEYWORDS_B if isinstance(data, bytes) else _SIGN_STATUS_KEYWORDS
+    for keywords, status in table:
+        if any(k in data for k in keywords):
+            return status
+    return "签到失败"
+
+
+def _parse_sign_page(data):
+    """
+    解析 HTML 格式的签到结果（data 可以是 UTF-8 原始 bytes 或文本）
+
+    Returns:
+        SignResult: 签到状态与积分/天数
+    """
+    return SignResult(_classify_sign_status(data), **_extract_sign_info(data))
+
+
 def sign_in(site, config, notify_func):
     """
     恩山论坛签到
@@ -47,11 +207,7 @@ def sign_in(site, config, notify_func):
         return False
     
     # 解析 Cookie
-    cookies = {}
-    for item in cookie_raw.split(';'):
-        if '=' in item:
-            k, v = item.strip().split('=', 1)
-            cookies[k] = v
+    cookies = dict(parse_cookie(cookie_raw))
 
     if not _has_auth_cookie(cookies):
         safe_print(f"[{name}] ✗ Cookie缺少登录态（*_auth），无法签到")
@@ -63,36 +219,20 @@ def sign_in(site, config, notify_func):
         
         safe_print(f"[{name}] 开始签到...")
         
-        # 创建会话
-        session = requests.Session()
+        # 创建会话（共享连接池，同一主机的连接跨请求复用）
+        session = new_session()
         session.cookies.update(cookies)
         session.headers.update({"User-Agent": ua})
         
-        # 1. 先访问首页保活Cookie（确保 base_url 有尾斜杠，避免 urljoin 截路径）
-        _base = base_url.rstrip('/') + '/'
-        safe_print(f"[{name}] 刷新会话...")
-        session.get(_base, timeout=15, allow_redirects=True)
-        import time
-        time.sleep(1)
-        
-        # 2. 重新访问获取 formhash
+        # 1. 访问首页获取 formhash（同时刷新会话Cookie；统一 base_url 尾斜杠）
         _base = base_url.rstrip('/') + '/'
-        res = session.get(_base, timeout=20, allow_redirects=True)
-        html = res.text
-        
-        # 提取 formhash（兼容 URL 参数与隐藏字段两种格式）
-        fh = re.search(r'formhash=([a-zA-Z0-9]+)', html)
-        if fh:
-            formhash = fh.group(1)
-        else:
-            fh_input = re.search(r'name=["\']formhash["\']\s+value=["\']([a-zA-Z0-9]+)["\']', html)
-            formhash = fh_input.group(1) if fh_input else None
+        formhash, page = _fetch_formhash(session, _base)
 
         if not formhash:
             # 诊断：检查是否存在登录相关的关键词
-            if "登录" in html or "login" in html.lower():
+            if _contains_any(page, _LOGIN_PAGE_RE_B, _LOGIN_PAGE_RE):
                 safe_print(f"[{name}] ✗ Cookie已失效，检测到登录页面")
-            elif "验证" in html or "verify" in html.lower():
+            elif _contains_any(page, _VERIFY_PAGE_RE_B, _VERIFY_PAGE_RE):
                 safe_print(f"[{name}] ✗ 需要验证，可能被5秒盾拦截")
             else:
                 safe_print(f"[{name}] ✗ Cookie已失效，无法获取 formhash")
@@ -101,13 +241,14 @@ def sign_in(site, config, notify_func):
 
         safe_print(f"[{name}] 获取 formhash 成功")
         
-        # 延迟后执行签到
-        time.sleep(1)
+        # 会话 Cookie 已齐全（Discuz 的 *_saltkey 已下发）时直接签到；
+        # 否则稍作等待，给服务端下发 Cookie 留出时间
+        if not any(k.endswith('_saltkey') for k in session.cookies.keys()):
+            time.sleep(0.5)
         
-        # 3. 执行签到
-        # 确保 base_url 有尾斜杠，否则 urljoin 会截掉最后一段路径
-        _base = base_url.rstrip('/') + '/'
-        sign_url = urljoin(_base, "plugin.php?id=erling_qd:action&action=sign&inajax=1")
+        # 2. 执行签到
+        # _base 已保证以 / 结尾，相对路径直接拼接即可，无需 urljoin 解析
+        sign_url = _base + _SIGN_PATH
         data = {
             "formhash": formhash,
             "qdxq": "kx",
@@ -126,42 +267,35 @@ def sign_in(site, config, notify_func):
             data=data,
             headers=headers,
             timeout=25,
-            allow_redirects=True
+            allow_redirects=False  # AJAX 接口直接返回结果，不跟随重定向
         )
         
-        # 4. 判断结果并提取信息
-        result_text = res_sign.text
+        # 接口被重定向通常是登录态失效（跳转到登录页）
+        if res_sign.is_redirect:
+            location = res_sign.headers.get('Location', '')
+            safe_print(f"[{name}] ✗ 签到接口被重定向（{location}），Cookie可能已失效")
+            notify_func(config, name, "Cookie已失效，请重新登录后更新Cookie")
+            return False
         
-        # 尝试解析JSON格式
+        # 3. 判断结果并提取信息
+        # 尝试解析JSON格式（直接解析原始 bytes，无需先解码为文本）
         try:
-            import json
-            result_json = json.loads(result_text)
+            result_json = json_loads(res_sign.content)
             
             # JSON格式的恩山返回
             if isinstance(result_json, dict):
-                sign_info_parts = []
-                
-                # 提取今日积分
-                if 'credit' in result_json:
-                    credit = result_json.get('credit', 0)
-                    sign_info_parts.append(f"今日积分：{credit}")
-                
-                # 提取连续签到天数
-                if 'continuous_days' in result_json:
-                    days = result_json.get('continuous_days', '0')
-                    sign_info_parts.append(f"连续签到：{days} 天")
-                
-                # 提取总签到天数
-                if 'total_days' in result_json:
-                    total = result_json.get('total_days', '0')
-                    sign_info_parts.append(f"总签到天数：{total} 天")
+                # 提取今日积分、连续签到天数、总签到天数
+                sign_info = {
+                    attr: result_json[key]
+                    for key, attr in _JSON_INFO_FIELDS if key in result_json
+                }
                 
                 # 提取消息
                 message = result_json.get('message', '')
                 success = result_json.get('success', False)
 
                 # 明确判定登录失效
-                if _is_login_required(message) or _is_login_required(result_text):
+                if _is_login_required(message) or _is_login_required(_raw_or_text(res_sign)):
                     safe_print(f"[{name}] ✗ Cookie已失效（接口返回：{message or '请先登录'}）")
                     notify_func(config, name, "Cookie已失效，请重新登录后更新Cookie")
                     return False
@@ -181,62 +315,35 @@ def sign_in(site, config, notify_func):
                     return False
                 
                 # 输出结果
-                if sign_info_parts:
-                    sign_info = "\n".join(sign_info_parts)
-                    safe_print(f"[{name}] ✓ {sign_status}")
-                    safe_print(f"[{name}] {sign_info}")
-                    notify_func(config, name, f"{sign_status}\n{sign_info}")
-                else:
-                    safe_print(f"[{name}] ✓ {sign_status}")
-                    notify_func(config, name, sign_status)
+                result = SignResult(sign_status, **sign_info)
+                details = format_details(result)
+                safe_print(f"[{name}] ✓ {sign_status}")
+                if details:
+                    safe_print(f"[{name}] {details}")
+                notify_func(config, name, format_notify(result))
                 
                 return True
-        except json.JSONDecodeError:
+        except JSONDecodeError:
             # 不是JSON格式，使用正则提取
             pass
         
-        # 备用：使用正则表达式提取（适合HTML格式）
-        sign_info_parts = []
-        
-        # 提取今日积分（多种可能的格式）
-        today_credit = re.search(r'今日积分[:：]\s*(\d+)', result_text) or \
-                      re.search(r'今日获得\s*(\d+)\s*积分', result_text) or \
-                      re.search(r'获得\s*(\d+)\s*积分', result_text)
-        if today_credit:
-            sign_info_parts.append(f"今日积分：{today_credit.group(1)}")
+        # 备用：使用正则表达式提取（适合HTML格式）；UTF-8 响应直接在原始 bytes 上处理，无需解码
+        result_page = _raw_or_text(res_sign)
         
-        # 提取连续签到
-        continuous = re.search(r'连续签到[:：]\s*(\d+)\s*天', result_text) or \
-                    re.search(r'已连续签到\s*(\d+)\s*天', result_text)
-        if continuous:
-            sign_info_parts.append(f"连续签到：{continuous.group(1)} 天")
-        
-        # 提取总签到天数
-        total_days = re.search(r'总签到天数[:：]\s*(\d+)\s*天', result_text) or \
-                    re.search(r'累计签到\s*(\d+)\s*天', result_text)
-        if total_days:
-            sign_info_parts.append(f"总签到天数：{total_days.group(1)} 天")
-        
-        # 判断签到状态
-        if _is_login_required(result_text):
+        # 判断签到状态（先排除登录失效，再提取签到信息）
+        if _is_login_required(result_page):
             safe_print(f"[{name}] ✗ Cookie已失效（接口返回未登录）")
             notify_func(config, name, "Cookie已失效，请重新登录后更新Cookie")
             return False
-        elif "成功" in result_text:
-            sign_status = "签到成功"
-        elif "已经" in result_text or "已签" in result_text:
-            sign_status = "今日已签到"
-        elif "恭喜" in result_text or "完成" in result_text:
-            sign_status = "签到完成"
-        else:
-            sign_status = "签到失败"
+        result = _parse_sign_page(result_page)
+        sign_status = result.status
+        details = format_details(result)
         
         # 输出结果
-        if sign_info_parts:
-            sign_info = "\n".join(sign_info_parts)
+        if details:
             safe_print(f"[{name}] ✓ {sign_status}")
-            safe_print(f"[{name}] {sign_info}")
-            notify_func(config, name, f"{sign_status}\n{sign_info}")
+            safe_print(f"[{name}] {details}")
+            notify_func(config, name, format_notify(result))
         else:
             if sign_status in ["签到成功", "今日已签到", "签到完成"]:
                 safe_print(f"[{name}] ✓ {sign_status}")
@@ -271,9 +378,8 @@ async def sign(base_url, cookies, **kwargs):
         return "签到失败：缺少Cookie"
     
     try:
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
+        # 同步实现放到线程中执行，避免阻塞事件循环
+        result = await asyncio.to_thread(
             _sign_sync,
             cookies,
             base_url
@@ -293,7 +399,7 @@ def _sign_sync(cookies, base_url):
             'Cookie': cookies
         }
         
-        session = requests.Session()
+        session = new_session()
         session.headers.update(headers)
         
         # 访问签到页面
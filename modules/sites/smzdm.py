@@ -2,9 +2,57 @@
 """
 什么值得买（SMZDM）签到模块 - 使用 Cookie 方式
 """
-import requests
+import asyncio
 import time
 from .. import safe_print
+from ._result import SignResult, format_details, format_notify
+from ..utils.http_session import new_session
+from ..utils.json_compat import loads as json_loads, JSONDecodeError
+
+# App 接口请求头（模拟安卓客户端，固定不变）
+_APP_HEADERS = {
+    "User-Agent": "smzdm_android_V8.7.8 rv:456 (Nexus 5;Android6.0.1;zh)smzdmapp",
+    "Content-Type": "application/x-www-form-urlencoded",
+}
+CHECKIN_URL = "https://api.smzdm.com/v1/user/checkin"
+USER_INFO_URL = "https://api.smzdm.com/v1/user/info"
+
+# 签到响应消息中表示"今日已签到"的关键词
+_ALREADY_SIGNED_KEYWORDS = ("已", "完成", "重复")
+
+
+def _app_form():
+    """App 接口公共表单参数（time 为当前毫秒时间戳）"""
+    return {
+        "weixin": "1",
+        "f": "android",
+        "v": "8.7.8",
+        "time": str(int(time.time() * 1000)),
+    }
+
+
+def _get_checkin_days(session, name):
+    """
+    获取用户信息中的连续签到天数
+
+    Args:
+        session: 已带 App 请求头与 Cookie 的会话（与签到请求共用连接）
+        name: 站点名称（用于日志）
+
+    Returns:
+        str 或 None（获取失败）
+    """
+    try:
+        res_user = session.post(USER_INFO_URL, data=_app_form(), timeout=20)
+        user_result = json_loads(res_user.content)
+        if str(user_result.get('error_code')) == '0':
+            data = user_result.get('data', {})
+            # 签到信息在 checkin 字段中
+            checkin_info = data.get('checkin', {})
+            return checkin_info.get('daily_attendance_number', '0')
+    except Exception as e:
+        safe_print(f"[{name}] DEBUG - 获取用户信息失败: {e}")
+    return None
 
 
 def sign_in(site, config, notify_func):
@@ -24,121 +72,68 @@ def sign_in(site, config, notify_func):
         notify_func(config, name, "配置错误：缺少Cookie")
         return False
     
-    # 解析 Cookie
-    cookies = {}
-    for item in cookie_raw.split(';'):
-        if '=' in item:
-            k, v = item.strip().split('=', 1)
-            cookies[k] = v
-    
     try:
-        ua = "smzdm_android_V8.7.8 rv:456 (Nexus 5;Android6.0.1;zh)smzdmapp"
-        headers = {
-            "User-Agent": ua,
-            "Content-Type": "application/x-www-form-urlencoded"
-        }
-        
         safe_print(f"[{name}] 开始签到...")
         
-        # 签到接口
-        checkin_url = "https://api.smzdm.com/v1/user/checkin"
+        # 签到与用户信息请求共用一个会话，复用到 api.smzdm.com 的连接
+        session = new_session()
+        session.headers.update(_APP_HEADERS)
+        # 原始 Cookie 字符串直接作为请求头发送，无需逐项解析
+        session.headers['Cookie'] = cookie_raw
         
         # 构造签到数据
-        timestamp = int(time.time() * 1000)
-        checkin_data = {
-            "weixin": "1",
-            "captcha": "",
-            "f": "android",
-            "v": "8.7.8",
-            "time": str(timestamp)
-        }
+        checkin_data = _app_form()
+        checkin_data["captcha"] = ""
         
-        res = requests.post(
-            checkin_url,
+        res = session.post(
+            CHECKIN_URL,
             data=checkin_data,
-            cookies=cookies,
-            headers=headers,
             timeout=20
         )
         
-        # 解析结果
+        # 解析结果（限流等情况下可能返回 HTML 错误页，包括非 UTF-8 编码的页面；
+        # json_loads 对两者都抛出 JSONDecodeError）
         try:
-            result = res.json()
-            error_code = str(result.get('error_code', ''))
-            
-            # 获取用户信息（包含签到天数）
-            def get_user_info():
-                try:
-                    user_info_url = "https://api.smzdm.com/v1/user/info"
-                    timestamp = int(time.time() * 1000)
-                    user_req_data = {
-                        "weixin": "1",
-                        "f": "android",
-                        "v": "8.7.8",
-                        "time": str(timestamp)
-                    }
-                    res_user = requests.post(
-                        user_info_url,
-                        data=user_req_data,
-                        cookies=cookies,
-                        headers=headers,
-                        timeout=20
-                    )
-                    user_result = res_user.json()
-                    if user_result.get('error_code') == '0' or user_result.get('error_code') == 0:
-                        data = user_result.get('data', {})
-                        # 签到信息在 checkin 字段中
-                        checkin_info = data.get('checkin', {})
-                        checkin_days = checkin_info.get('daily_attendance_number', '0')
-                        smzdm_id = data.get('smzdm_id', '')
-                        return f"连续签到天数: {checkin_days}", smzdm_id
-                except Exception as e:
-                    safe_print(f"[{name}] DEBUG - 获取用户信息失败: {e}")
-                return None, None
-            
-            if error_code == '0':
-                # 签到成功
-                sign_info, smzdm_id = get_user_info()
-                if sign_info:
-                    safe_print(f"[{name}] ✓ 签到成功")
-                    safe_print(f"[{name}] {sign_info}")
-                    notify_func(config, name, f"签到成功\n{sign_info}")
-                else:
-                    safe_print(f"[{name}] ✓ 签到成功")
-                    notify_func(config, name, "签到成功")
-                return True
-            elif '11111' in error_code:
-                # Cookie 失效
-                safe_print(f"[{name}] Cookie 已失效，请更新")
-                notify_func(config, name, "Cookie已失效")
-                return False
-            else:
-                # 其他情况，可能已签到
-                msg = result.get('error_msg', '未知状态')
-                safe_print(f"[{name}] 签到响应: {msg}")
-                
-                # 尝试获取签到信息
-                sign_info, smzdm_id = get_user_info()
-                
-                # 如果包含"已经"等关键词，视为已签到
-                if any(x in msg for x in ["已", "完成", "重复"]):
-                    if sign_info:
-                        safe_print(f"[{name}] {sign_info}")
-                        notify_func(config, name, f"今日已签到\n{sign_info}")
-                    else:
-                        notify_func(config, name, "今日已签到")
-                else:
-                    if sign_info:
-                        notify_func(config, name, f"签到完成: {msg}\n{sign_info}")
-                    else:
-                        notify_func(config, name, f"签到完成: {msg}")
-                return True
-                
-        except Exception as e:
+            result = json_loads(res.content)
+        except JSONDecodeError as e:
             safe_print(f"[{name}] 解析响应失败: {e}")
-            safe_print(f"[{name}] 响应内容: {res.text[:200]}")
+            preview = res.content[:200].decode(res.encoding or 'utf-8', errors='replace')
+            safe_print(f"[{name}] 响应内容: {preview}")
             notify_func(config, name, "签到完成（响应异常）")
             return False
+        
+        error_code = str(result.get('error_code', ''))
+        
+        if error_code == '0':
+            # 签到成功
+            sign_result = SignResult("签到成功", continuous_days=_get_checkin_days(session, name))
+            safe_print(f"[{name}] ✓ 签到成功")
+            if sign_result.continuous_days is not None:
+                safe_print(f"[{name}] {format_details(sign_result)}")
+            notify_func(config, name, format_notify(sign_result))
+            return True
+        elif '11111' in error_code:
+            # Cookie 失效
+            safe_print(f"[{name}] Cookie 已失效，请更新")
+            notify_func(config, name, "Cookie已失效")
+            return False
+        else:
+            # 其他情况，可能已签到
+            msg = result.get('error_msg', '未知状态')
+            safe_print(f"[{name}] 签到响应: {msg}")
+            
+            # 如果包含"已经"等关键词，视为已签到
+            if any(x in msg for x in _ALREADY_SIGNED_KEYWORDS):
+                status = "今日已签到"
+            else:
+                status = f"签到完成: {msg}"
+            
+            # 尝试获取签到信息
+            sign_result = SignResult(status, continuous_days=_get_checkin_days(session, name))
+            if sign_result.continuous_days is not None:
+                safe_print(f"[{name}] {format_details(sign_result)}")
+            notify_func(config, name, format_notify(sign_result))
+            return True
             
     except Exception as e:
         safe_print(f"[{name}] ✗ 运行出错: {e}")
@@ -163,9 +158,8 @@ async def sign(base_url, cookies, **kwargs):
         return "签到失败：缺少Cookie"
     
     try:
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
+        # 同步实现放到线程中执行，避免阻塞事件循环
+        result = await asyncio.to_thread(
             _sign_sync,
             cookies,
             base_url
@@ -185,7 +179,7 @@ def _sign_sync(cookies, base_url):
             'Cookie': cookies
         }
         
-        session = requests.Session()
+        session = new_session()
         session.headers.update(headers)
         
         # 签到接口
@@ -193,7 +187,7 @@ def _sign_sync(cookies, base_url):
         resp = session.post(sign_url, timeout=10)
         
         if resp.status_code == 200:
-            data = resp.json()
+            data = json_loads(resp.content)
             if data.get('success'):
                 return f"签到成功：{data.get('msg', '签到完成')}"
             else:
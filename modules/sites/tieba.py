@@ -4,11 +4,136 @@
 """
 import asyncio
 import re
+import threading
 import time
-import random
 import requests
-from urllib.parse import quote
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
 from .. import safe_print, get_user_agent
+from ..utils.http_session import new_session
+from ..utils.json_compat import loads as json_loads
+
+# lxml 为可选依赖：安装后用 C 实现的 HTML 解析器提取贴吧列表，否则回退到正则
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+SIGN_URL = 'https://tieba.baidu.com/sign/add'
+MYLIKE_URL = 'https://tieba.baidu.com/f/like/mylike?pn={}'
+# 并发签到 / 翻页的线程数（同一会话共享连接池，不宜过大以免触发风控）
+_SIGN_WORKERS = 8
+_PAGE_WORKERS = 8
+
+_BAR_RE = re.compile(r'href="/f\?kw=[^"]+"\s+title="([^"]+)"')
+_TOTAL_PAGES_RE = re.compile(r'&pn=([^"]+)">尾页</a>')
+
+
+class _TokenBucket:
+    """
+    令牌桶限速器（线程安全）
+
+    以 rate 个/秒的速度补充令牌，最多积攒 burst 个；
+    acquire() 在无可用令牌时阻塞到下一个令牌产生，并发线程共享同一速率上限。
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取走一个令牌，必要时等待"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 令牌不足时预支一个，在锁外等待到其补足的时刻
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+# 签到请求限速：稳定 2 次/秒，允许 4 次突发（替代每个贴吧后的随机休眠）
+_SIGN_RATE_LIMITER = _TokenBucket(rate=2.0, burst=4)
+
+
+def _parse_mylike(resp):
+    """
+    解析关注列表页面
+
+    Returns:
+        (bars, total_pages): 本页贴吧名称列表；总页数（页面无"尾页"链接时为 1）
+    """
+    if lxml_html is not None:
+        # 直接解析原始 bytes；按 HTTP 头声明的编码解码（与 resp.text 一致），
+        # 未声明时由 lxml 根据页面 <meta charset> 判断
+        parser = lxml_html.HTMLParser(encoding=resp.encoding) if resp.encoding else None
+        tree = lxml_html.fromstring(resp.content, parser=parser)
+        bars = tree.xpath('//a[starts-with(@href, "/f?kw=")]/@title')
+        last_href = tree.xpath('//a[text()="尾页"]/@href')
+        pn = parse_qs(urlparse(last_href[0]).query).get('pn') if last_href else None
+        total_pages = pn[0] if pn else None
+    else:
+        text = resp.text
+        bars = _BAR_RE.findall(text)
+        total_pages_match = _TOTAL_PAGES_RE.search(text)
+        total_pages = total_pages_match.group(1) if total_pages_match else None
+    return bars, int(total_pages) if total_pages else 1
+
+
+def _fetch_bar_page(session, page):
+    """获取关注列表第 page 页的贴吧名称（在线程池中执行，失败时返回 None）"""
+    resp = session.get(MYLIKE_URL.format(page), timeout=10)
+    if resp.status_code != 200:
+        return None
+    return _parse_mylike(resp)[0]
+
+
+def _sign_one_bar(session, bar, sign_headers, name):
+    """
+    签到单个贴吧（在线程池中执行）
+
+    Returns:
+        (tag, value): tag 为 'signed' / 'already' / 'failed'，
+        value 为贴吧名或 "贴吧名: 错误信息"
+    """
+    try:
+        _SIGN_RATE_LIMITER.acquire()
+        
+        # 表单由 requests 统一编码（UTF-8 + 百分号转义）
+        sign_data = {'ie': 'utf-8', 'kw': bar}
+        sign_resp = session.post(SIGN_URL, data=sign_data, headers=sign_headers, timeout=10)
+        
+        if sign_resp.status_code != 200:
+            safe_print(f"[{name}] ✗ {bar}: HTTP {sign_resp.status_code}")
+            return 'failed', f"{bar}: HTTP {sign_resp.status_code}"
+        
+        result = json_loads(sign_resp.content)
+        error_msg = result.get('error')
+        
+        # 签到成功
+        if error_msg == '':
+            forum_name = result.get('data', {}).get('forum_info', {}).get('forum_name', bar)
+            safe_print(f"[{name}] ✓ {forum_name}")
+            return 'signed', forum_name
+        
+        # 已经签到过：匹配"亲，你之前已经签过了"等消息
+        error_msg = error_msg or '未知错误'
+        if '已经签' in error_msg or '已签' in error_msg:
+            safe_print(f"[{name}] - {bar} (已签)")
+            return 'already', bar
+        
+        safe_print(f"[{name}] ✗ {bar}: {error_msg}")
+        return 'failed', f"{bar}: {error_msg}"
+        
+    except Exception as e:
+        safe_print(f"[{name}] ✗ {bar}: {e}")
+        return 'failed', f"{bar}: {str(e)}"
 
 
 def sign_in(site, config, notify_func):
@@ -43,7 +168,7 @@ def sign_in(site, config, notify_func):
         'Referer': 'https://tieba.baidu.com/'
     }
     
-    session = requests.Session()
+    session = new_session()
     session.headers.update(headers)
     
     try:
@@ -63,8 +188,7 @@ def sign_in(site, config, notify_func):
         all_bars = []
         
         # 获取第一页以确定总页数，并直接输出第一页贴吧列表
-        first_page_url = 'https://tieba.baidu.com/f/like/mylike?pn=1'
-        first_resp = session.get(first_page_url, timeout=10)
+        first_resp = session.get(MYLIKE_URL.format(1), timeout=10)
         
         if first_resp.status_code != 200:
             result_msg = "签到失败: 无法获取贴吧列表"
@@ -72,30 +196,27 @@ def sign_in(site, config, notify_func):
             notify_func(config, name, result_msg)
             return False
         
-        # 提取总页数
-        total_pages_match = re.search(r'&pn=([^"]+)">\u5c3e\u9875</a>', first_resp.text)
-        total_pages = int(total_pages_match.group(1)) if total_pages_match else 1
+        # 第一页同时提供总页数与本页贴吧（避免重复请求）
+        bars, total_pages = _parse_mylike(first_resp)
         safe_print(f"[{name}] \u5171{total_pages}\u9875\u8d34\u5427")
-        
-        # 直接解析第一页贴吧（避免重复请求）
-        bars = re.findall(r'href="/f\?kw=[^"]+"\s+title="([^"]+)"', first_resp.text)
         all_bars.extend(bars)
         safe_print(f"[{name}] \u7b2c1\u9875: \u627e\u5230{len(bars)}\u4e2a\u8d34\u5427")
         
-        # 遍历剩余页面（从第 2 页开始）
-        for page in range(2, total_pages + 1):
-            page_url = f'https://tieba.baidu.com/f/like/mylike?pn={page}'
-            page_resp = session.get(page_url, timeout=10)
-            
-            if page_resp.status_code == 200:
-                # 提取当前页所有贴吧名称
-                bars = re.findall(r'href="/f\?kw=[^"]+"\s+title="([^"]+)"', page_resp.text)
-                all_bars.extend(bars)
-                safe_print(f"[{name}] 第{page}页: 找到{len(bars)}个贴吧")
-            
-            # 翻页延迟
-            if page < total_pages:
-                time.sleep(random.uniform(0.5, 1.5))
+        # 剩余页面（从第 2 页开始）并发获取；map 保持页码顺序
+        if total_pages > 1:
+            with ThreadPoolExecutor(max_workers=_PAGE_WORKERS) as executor:
+                pages = executor.map(
+                    lambda page: _fetch_bar_page(session, page),
+                    range(2, total_pages + 1)
+                )
+                failed_pages = 0
+                for bars in pages:
+                    if bars is None:
+                        failed_pages += 1
+                    else:
+                        all_bars.extend(bars)
+            if failed_pages:
+                safe_print(f"[{name}] {failed_pages}页获取失败")
         
         safe_print(f"[{name}] 共找到{len(all_bars)}个贴吧")
         
@@ -106,10 +227,6 @@ def sign_in(site, config, notify_func):
             return False
         
         # 3. 对每个贴吧进行签到
-        signed = []  # 签到成功的贴吧
-        already_signed = []  # 已签到的贴吧
-        failed = []  # 签到失败的贴吧
-        
         sign_headers = headers.copy()
         sign_headers.update({
             'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
@@ -117,42 +234,20 @@ def sign_in(site, config, notify_func):
             'Origin': 'https://tieba.baidu.com'
         })
         
-        for bar in all_bars:
-            try:
-                sign_url = 'https://tieba.baidu.com/sign/add'
-                sign_data = f'ie=utf-8&kw={quote(bar)}'
-                
-                sign_resp = session.post(sign_url, data=sign_data, headers=sign_headers, timeout=10)
-                
-                if sign_resp.status_code == 200:
-                    result = sign_resp.json()
-                    
-                    # 签到成功
-                    if result.get('error') == '':
-                        forum_name = result.get('data', {}).get('forum_info', {}).get('forum_name', bar)
-                        signed.append(forum_name)
-                        safe_print(f"[{name}] ✓ {forum_name}")
-                    
-                    # 已经签到过
-                    elif 'error' in result:
-                        error_msg = result.get('error', '')
-                        # 匹配"亲，你之前已经签过了"等消息
-                        if '已经签' in error_msg or '已签' in error_msg:
-                            already_signed.append(bar)
-                            safe_print(f"[{name}] - {bar} (已签)")
-                        else:
-                            failed.append(f"{bar}: {error_msg}")
-                            safe_print(f"[{name}] ✗ {bar}: {error_msg}")
-                else:
-                    failed.append(f"{bar}: HTTP {sign_resp.status_code}")
-                    safe_print(f"[{name}] ✗ {bar}: HTTP {sign_resp.status_code}")
-                
-                # 随机延迟，避免请求过快
-                time.sleep(random.uniform(0.5, 2.0))
-                
-            except Exception as e:
-                failed.append(f"{bar}: {str(e)}")
-                safe_print(f"[{name}] ✗ {bar}: {e}")
+        # 各贴吧签到互不依赖，并发执行；工作线程只返回结果，
+        # 由当前线程按 map 的原贴吧顺序归类，无共享列表写入
+        with ThreadPoolExecutor(max_workers=_SIGN_WORKERS) as executor:
+            outcomes = list(executor.map(
+                lambda bar: _sign_one_bar(session, bar, sign_headers, name),
+                all_bars
+            ))
+        
+        buckets = defaultdict(list)
+        for tag, value in outcomes:
+            buckets[tag].append(value)
+        signed = buckets['signed']  # 签到成功的贴吧
+        already_signed = buckets['already']  # 已签到的贴吧
+        failed = buckets['failed']  # 签到失败的贴吧
         
         # 4. 生成结果消息
         result_parts = []
@@ -220,9 +315,8 @@ async def sign(base_url, cookies, **kwargs):
         return "签到失败：缺少Cookie"
     
     try:
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
+        # 同步实现放到线程中执行，避免阻塞事件循环
+        result = await asyncio.to_thread(
             _sign_sync,
             cookies,
             base_url
@@ -242,7 +336,7 @@ def _sign_sync(cookies, base_url):
             'Cookie': cookies
         }
         
-        session = requests.Session()
+        session = new_session()
         session.headers.update(headers)
         
         # 获取关注贴吧列表
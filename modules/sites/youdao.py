@@ -2,9 +2,82 @@
 """
 有道云笔记签到模块
 """
+import asyncio
 import re
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from .. import safe_print, get_user_agent
+from ..utils.http_session import new_session
+from ..utils.json_compat import loads as json_loads
+
+# Cookie 中 YNOTE_CSTK 的前 8 位即 Windows 签到接口所需的 cstk 参数
+_CSTK_RE = re.compile(r'YNOTE_CSTK=(.{8})')
+
+_MB = 1024 * 1024
+
+LOGIN_REWARD_URL = 'https://note.youdao.com/yws/api/daupromotion?method=sync'
+ANDROID_CHECKIN_URL = 'https://note.youdao.com/yws/mapi/user?method=checkin&_system=android'
+WINDOWS_CHECKIN_URL = (
+    'https://note.youdao.com/yws/mapi/user?method=checkin&device_type=PC&_system=windows'
+    '&_appName=ynote&_vendor=official-website&cstk={cstk}'
+)
+USER_INFO_URL = 'https://note.youdao.com/yws/mapi/user?method=get'
+
+# 空间类接口：(结果消息标签, 日志标签, 失败日志, URL, 请求头类型, 响应中的字节数字段)
+# 请求头类型 'android' 使用 ynote-android UA，'pc' 使用全局 UA；URL 中的 {cstk} 在签到时填入
+_CHECKIN_ENDPOINTS = (
+    ("Android登录奖励", "Android登录奖励", "Android登录奖励失败",
+     LOGIN_REWARD_URL, 'android', 'rewardSpace'),
+    ("Android签到", "Android签到奖励", "Android签到失败",
+     ANDROID_CHECKIN_URL, 'android', 'space'),
+    ("Windows签到", "Windows签到奖励", "Windows签到失败",
+     WINDOWS_CHECKIN_URL, 'pc', 'space'),
+)
+# 总容量在签到完成后查询，结果包含本次奖励
+_USER_INFO_ENDPOINT = ("总容量", "当前总容量", "获取用户信息失败", USER_INFO_URL, 'android', 'total')
+
+
+def _find_int(node, key):
+    """
+    在解析后的 JSON 中深度优先查找首个名为 key 的整数字段
+
+    按文档顺序遍历，与在原始文本上查找首个 "key":数字 的结果一致。
+
+    Returns:
+        int 或 None（未找到）
+    """
+    if isinstance(node, dict):
+        for k, v in node.items():
+            if k == key and isinstance(v, int) and not isinstance(v, bool):
+                return v
+            if isinstance(v, (dict, list)):
+                found = _find_int(v, key)
+                if found is not None:
+                    return found
+    elif isinstance(node, list):
+        for v in node:
+            found = _find_int(v, key)
+            if found is not None:
+                return found
+    return None
+
+
+def _post_space(session, url, headers, key):
+    """
+    POST 指定接口并从 JSON 响应中读取空间字段（字节数）
+
+    Returns:
+        int 或 None（非 200 响应或未找到字段）；网络/解析异常向上抛出
+    """
+    resp = session.post(url, headers=headers, timeout=10)
+    if resp.status_code != 200:
+        return None
+    return _find_int(json_loads(resp.content), key)
+
+
+def _to_mb(space_bytes):
+    """字节数换算为 MB 文本（保留两位小数）"""
+    return f"{space_bytes / _MB:.2f}"
 
 
 def sign_in(site, config, notify_func):
@@ -42,11 +115,11 @@ def sign_in(site, config, notify_func):
         'Cookie': cookie
     }
     
-    session = requests.Session()
+    session = new_session()
     
     try:
         # 1. 提取CSTK参数
-        cstk_match = re.search(r'YNOTE_CSTK=(.{8})', cookie)
+        cstk_match = _CSTK_RE.search(cookie)
         if not cstk_match:
             result_msg = "签到失败: 无法提取CSTK参数"
             safe_print(f"[{name}] {result_msg}")
@@ -57,68 +130,32 @@ def sign_in(site, config, notify_func):
         safe_print(f"[{name}] CSTK: {cstk}")
         
         rewards = []
+        headers_by_kind = {'android': headers_android, 'pc': headers}
         
-        # 2. Android客户端登录奖励
-        try:
-            login_url = 'https://note.youdao.com/yws/api/daupromotion?method=sync'
-            login_resp = session.post(login_url, headers=headers_android, timeout=10)
-            if login_resp.status_code == 200:
-                login_data = login_resp.json()
-                if 'rewardSpace' in str(login_data):
-                    reward_match = re.search(r'"rewardSpace":(\d+)', login_resp.text)
-                    if reward_match:
-                        space_bytes = int(reward_match.group(1))
-                        space_mb = round(space_bytes / (1024 * 1024), 2)
-                        rewards.append(f"Android登录奖励: {space_mb}MB")
-                        safe_print(f"[{name}] Android登录奖励: {space_mb}MB")
-        except Exception as e:
-            safe_print(f"[{name}] Android登录奖励失败: {e}")
+        def post(endpoint):
+            url, kind, key = endpoint[3:]
+            return _post_space(session, url.format(cstk=cstk), headers_by_kind[kind], key)
         
-        # 3. Android客户端签到
-        try:
-            android_url = 'https://note.youdao.com/yws/mapi/user?method=checkin&_system=android'
-            android_resp = session.post(android_url, headers=headers_android, timeout=10)
-            if android_resp.status_code == 200:
-                android_data = android_resp.json()
-                if 'space' in str(android_data):
-                    space_match = re.search(r'"space":(\d+)', android_resp.text)
-                    if space_match:
-                        space_bytes = int(space_match.group(1))
-                        space_mb = round(space_bytes / (1024 * 1024), 2)
-                        rewards.append(f"Android签到: {space_mb}MB")
-                        safe_print(f"[{name}] Android签到奖励: {space_mb}MB")
-        except Exception as e:
-            safe_print(f"[{name}] Android签到失败: {e}")
+        def report(endpoint, fetch):
+            label, log_label, error_label = endpoint[:3]
+            try:
+                space_bytes = fetch()
+            except Exception as e:
+                safe_print(f"[{name}] {error_label}: {e}")
+                return
+            if space_bytes is not None:
+                space_mb = _to_mb(space_bytes)
+                rewards.append(f"{label}: {space_mb}MB")
+                safe_print(f"[{name}] {log_label}: {space_mb}MB")
         
-        # 4. Windows客户端签到
-        try:
-            windows_url = f'https://note.youdao.com/yws/mapi/user?method=checkin&device_type=PC&_system=windows&_appName=ynote&_vendor=official-website&cstk={cstk}'
-            windows_resp = session.post(windows_url, headers=headers, timeout=10)
-            if windows_resp.status_code == 200:
-                windows_data = windows_resp.json()
-                if 'space' in str(windows_data):
-                    space_match = re.search(r'"space":(\d+)', windows_resp.text)
-                    if space_match:
-                        space_bytes = int(space_match.group(1))
-                        space_mb = round(space_bytes / (1024 * 1024), 2)
-                        rewards.append(f"Windows签到: {space_mb}MB")
-                        safe_print(f"[{name}] Windows签到奖励: {space_mb}MB")
-        except Exception as e:
-            safe_print(f"[{name}] Windows签到失败: {e}")
+        # 2~4. Android登录奖励、Android签到、Windows签到互不依赖，并发请求
+        with ThreadPoolExecutor(max_workers=len(_CHECKIN_ENDPOINTS)) as executor:
+            futures = [executor.submit(post, ep) for ep in _CHECKIN_ENDPOINTS]
+        for endpoint, future in zip(_CHECKIN_ENDPOINTS, futures):
+            report(endpoint, future.result)
         
         # 5. 获取用户信息
-        try:
-            user_url = 'https://note.youdao.com/yws/mapi/user?method=get'
-            user_resp = session.post(user_url, headers=headers_android, timeout=10)
-            if user_resp.status_code == 200:
-                capacity_match = re.search(r'"total":(\d+)', user_resp.text)
-                if capacity_match:
-                    total_bytes = int(capacity_match.group(1))
-                    total_mb = round(total_bytes / (1024 * 1024), 2)
-                    rewards.append(f"总容量: {total_mb}MB")
-                    safe_print(f"[{name}] 当前总容量: {total_mb}MB")
-        except Exception as e:
-            safe_print(f"[{name}] 获取用户信息失败: {e}")
+        report(_USER_INFO_ENDPOINT, lambda: post(_USER_INFO_ENDPOINT))
         
         # 生成结果消息
         if rewards:
@@ -159,9 +196,8 @@ async def sign(base_url, cookies, **kwargs):
         return "签到失败：缺少Cookie"
     
     try:
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
+        # 同步实现放到线程中执行，避免阻塞事件循环
+        result = await asyncio.to_thread(
             _sign_sync,
             cookies,
             base_url
@@ -181,7 +217,7 @@ def _sign_sync(cookies, base_url):
             'Cookie': cookies
         }
         
-        session = requests.Session()
+        session = new_session()
         session.headers.update(headers)
         
         # 签到接口
@@ -189,7 +225,7 @@ def _sign_sync(cookies, base_url):
         resp = session.post(sign_url, timeout=10)
         
         if resp.status_code == 200:
-            data = resp.json()
+            data = json_loads(resp.content)
             if data.get('ret') == 0:
                 return f"签到成功：{data.get('msg', '签到完成')}"
             else:
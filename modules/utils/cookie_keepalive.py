@@ -2,19 +2,46 @@
 """
 Cookie 保活模块 - 优先使用Playwright刷新，失败时使用CookieCloud同步
 """
+import atexit
 import os
+import queue
 import sys
 import re
+import threading
 import time
 import datetime
 import json
-from urllib.parse import urljoin
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from operator import itemgetter
+from urllib.parse import urljoin, urlparse
 
 # 添加项目根目录到 sys.path，以便导入模块
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from modules import get_user_agent
+from modules.sites import SITE_REGISTRY, parse_cookie
+from . import cookie_sync
+from . import cookie_metadata
+from .http_session import new_session
+
+# Cookie 值中的 UNIX 时间戳（10 位数字，以 1 开头）
+_TS_RE = re.compile(r'\b1\d{9}\b')
+
+# Playwright Cookie 条目 → (name, value)
+_COOKIE_NAME_VALUE = itemgetter('name', 'value')
+# (key, value) 条目 → value
+_GET_VAL = itemgetter(1)
+
+# 未登录页面特征：合并为一个忽略大小写的正则，单次扫描页面，无需先 lower() 复制整页
+# 注意：不要使用单独的 '登录'，它会匹配 '退出登录' 导致误判
+_LOGGED_OUT_KEYWORDS = (
+    '请先登录', '先登录', '未登录', '登录后',
+    'member.php?mod=logging', 'action=login',
+)
+_LOGGED_OUT_RE = re.compile('|'.join(map(re.escape, _LOGGED_OUT_KEYWORDS)), re.IGNORECASE)
+
 
 def parse_cookie_string(cookie_raw):
     """
@@ -26,12 +53,8 @@ def parse_cookie_string(cookie_raw):
     Returns:
         dict: Cookie字典
     """
-    cookies = {}
-    for item in cookie_raw.split(';'):
-        if '=' in item:
-            k, v = item.strip().split('=', 1)
-            cookies[k] = v
-    return cookies
+    # 与签到模块共用按字符串缓存的解析结果（同一 Cookie 在每次保活中会被解析多次）
+    return dict(parse_cookie(cookie_raw))
 
 
 def has_right_auth_cookie(cookie_dict):
@@ -55,7 +78,6 @@ def has_auth_cookie(cookie_dict, module=''):
     if not isinstance(cookie_dict, dict):
         return False
     if module:
-        from modules.sites import SITE_REGISTRY
         auth_keys = (SITE_REGISTRY.get(module) or {}).get('auth_cookies', [])
     else:
         auth_keys = []
@@ -76,13 +98,7 @@ def page_indicates_logged_out(html_text):
     """判断页面内容是否显示未登录状态"""
     if not html_text:
         return True
-    text = str(html_text).lower()
-    # 注意：不要使用单独的 '登录'，它会匹配 '退出登录' 导致误判
-    keywords = [
-        '请先登录', '先登录', '未登录', '登录后',
-        'member.php?mod=logging', 'action=login'
-    ]
-    return any(keyword in text for keyword in keywords)
+    return _LOGGED_OUT_RE.search(str(html_text)) is not None
 
 
 def extract_cookie_timestamps(cookie_dict):
@@ -97,10 +113,10 @@ def extract_cookie_timestamps(cookie_dict):
     """
     timestamps = {}
     for key, value in cookie_dict.items():
-        # 查找UNIX时间戳（10位数字，以1开头）
-        ts_matches = re.findall(r'\b1\d{9}\b', str(value))
-        if ts_matches:
-            timestamps[key] = int(ts_matches[0])
+        # 只需要第一个时间戳，用 search 而不是 findall 构建完整列表
+        ts_match = _TS_RE.search(value if isinstance(value, str) else str(value))
+        if ts_match:
+            timestamps[key] = int(ts_match.group())
     return timestamps
 
 
@@ -134,20 +150,16 @@ def analyze_cookie_validity(cookie_dict):
         }
     
     # 找最早的时间戳（即最先过期的时间），以该时间戳作为 Cookie 有效期上限
-    max_timestamp = min(timestamps.values())
-    max_key = [k for k, v in timestamps.items() if v == max_timestamp][0]
+    # 单次遍历同时得到时间戳及其参数名（并列时取第一个）
+    max_key, max_timestamp = min(timestamps.items(), key=_GET_VAL)
     
     now = time.time()
     remaining_seconds = int(max_timestamp - now)
     remaining_hours = remaining_seconds / 3600
     
-    # 计算过期时间
-    if remaining_seconds > 0:
-        expires_at = datetime.datetime.fromtimestamp(max_timestamp).strftime('%H:%M:%S')
-        valid = True
-    else:
-        expires_at = (datetime.datetime.now() - datetime.timedelta(seconds=abs(remaining_seconds))).strftime('%H:%M:%S')
-        valid = False
+    # 计算过期时间（已过期时即为过去的时刻，两种情况格式相同）
+    expires_at = time.strftime('%H:%M:%S', time.localtime(max_timestamp))
+    valid = remaining_seconds > 0
     
     return {
         'valid': valid,
@@ -159,6 +171,116 @@ def analyze_cookie_validity(cookie_dict):
     }
 
 
+# ==================== Playwright 浏览器线程 ====================
+# Playwright 同步 API 的对象只能在创建它的线程中使用，而每次保活运行在独立线程中，
+# 因此由一个常驻线程持有 Playwright 与 Chromium：浏览器只启动一次，
+# 每次刷新只新建/关闭一个 BrowserContext（比重新启动浏览器轻量得多）
+_PW_QUEUE = queue.Queue()
+_pw_worker = None
+_pw_worker_lock = threading.Lock()
+# 等待浏览器线程返回结果的上限（页面加载 60 秒 + 余量）
+_PW_RESULT_TIMEOUT = 180
+
+
+def _pw_loop():
+    """浏览器线程主循环：按需启动浏览器并执行提交的任务，收到 None 时关闭浏览器退出"""
+    from playwright.sync_api import sync_playwright
+
+    pw = None
+    browser = None
+    try:
+        while True:
+            item = _PW_QUEUE.get()
+            if item is None:
+                return
+            func, args, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                # 浏览器未启动或已断开（崩溃、被杀）时重新启动
+                if browser is None or not browser.is_connected():
+                    if pw is None:
+                        pw = sync_playwright().start()
+                    browser = pw.chromium.launch(headless=True)
+                future.set_result(func(browser, *args))
+            except Exception as e:
+                future.set_exception(e)
+    finally:
+        try:
+            if browser is not None:
+                browser.close()
+            if pw is not None:
+                pw.stop()
+        except Exception:
+            pass
+
+
+def _ensure_pw_worker():
+    """按需启动浏览器线程（只启动一次）"""
+    global _pw_worker
+    with _pw_worker_lock:
+        if _pw_worker is None or not _pw_worker.is_alive():
+            _pw_worker = threading.Thread(target=_pw_loop, daemon=True, name="Playwright")
+            _pw_worker.start()
+
+
+def _run_in_browser(func, *args):
+    """
+    在浏览器线程中执行 func(browser, *args) 并等待结果（异常原样抛出）
+
+    等待超时时取消任务：仍在队列中排队的任务不会再执行（正在执行的任务无法中断）。
+    """
+    _ensure_pw_worker()
+    future = Future()
+    _PW_QUEUE.put((func, args, future))
+    try:
+        return future.result(timeout=_PW_RESULT_TIMEOUT)
+    except FutureTimeoutError:
+        future.cancel()
+        raise
+
+
+@atexit.register
+def _shutdown_pw():
+    """进程退出时关闭浏览器并停止 Playwright"""
+    worker = _pw_worker
+    if worker is not None and worker.is_alive():
+        _PW_QUEUE.put(None)
+        worker.join(timeout=10)
+
+
+def _collect_cookies(browser, cookie_list, url):
+    """
+    在新的浏览器上下文中注入 Cookie 并访问 url，返回访问后的全部 Cookie（在浏览器线程中执行）
+    """
+    context = browser.new_context()
+    try:
+        # 注入现有Cookie
+        context.add_cookies(cookie_list)
+        
+        # 创建页面并访问论坛
+        page = context.new_page()
+        page.goto(url, wait_until='domcontentloaded', timeout=60000)
+        
+        # 等待页面加载完成（load 超时不影响 Cookie 刷新）
+        try:
+            page.wait_for_load_state('load', timeout=10000)
+        except Exception:
+            pass
+        
+        # 等待页面脚本的后续请求结束（可能写入新Cookie），最多 3 秒
+        try:
+            page.wait_for_load_state('networkidle', timeout=3000)
+        except Exception:
+            pass
+        
+        # 提取新Cookie
+        return context.cookies()
+    finally:
+        # 只关闭上下文，浏览器保持运行供下次复用
+        context.close()
+
+
 def refresh_cookie_with_playwright(site, config):
     """
     使用Playwright刷新Cookie
@@ -174,11 +296,12 @@ def refresh_cookie_with_playwright(site, config):
         dict: {
             'success': bool,
             'cookie_raw': str,  # 新Cookie（如果成功）
+            'cookie_list': list,  # Playwright 返回的原始 Cookie 列表（仅成功时）
             'message': str
         }
     """
     try:
-        from playwright.sync_api import sync_playwright
+        import playwright.sync_api  # noqa: F401
     except ImportError:
         return {
             'success': False,
@@ -186,7 +309,6 @@ def refresh_cookie_with_playwright(site, config):
             'message': 'Playwright未安装'
         }
     
-    from modules.sites import SITE_REGISTRY
     name = site.get('name', '')
     _module = site.get('module', '')
     _fallback_url = (SITE_REGISTRY.get(_module) or {}).get('base_url', '')
@@ -206,8 +328,7 @@ def refresh_cookie_with_playwright(site, config):
         
         # 从 base_url 动态提取 Cookie 注入域名
         # 处理 .com.cn / .co.uk 等二级 ccTLD：末位 2 字符 + 次末位 ≤3 字符时取最后3段
-        from urllib.parse import urlparse as _urlparse
-        _parsed = _urlparse(url)
+        _parsed = urlparse(url)
         _hostname = _parsed.hostname or 'right.com.cn'
         _parts = _hostname.split('.')
         if len(_parts) >= 3 and len(_parts[-1]) == 2 and len(_parts[-2]) <= 3:
@@ -227,65 +348,29 @@ def refresh_cookie_with_playwright(site, config):
                 'path': '/'
             })
         
-        # 启动Playwright浏览器
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context()
-            
-            # 注入现有Cookie
-            context.add_cookies(cookie_list)
-            
-            # 创建页面并访问论坛
-            page = context.new_page()
-            response = page.goto(url, wait_until='domcontentloaded', timeout=60000)
-            
-            # 等待页面加载完成（load 超时不影响 Cookie 刷新）
-            try:
-                page.wait_for_load_state('load', timeout=10000)
-            except Exception:
-                pass
-            
-            # 让JavaScript执行完成
-            try:
-                page.evaluate('''
-                    new Promise(resolve => {
-                        let waitCount = 0;
-                        const waitInterval = setInterval(() => {
-                            waitCount++;
-                            if (waitCount > 5) {
-                                clearInterval(waitInterval);
-                                resolve(true);
-                            }
-                        }, 100);
-                    });
-                ''')
-            except:
-                pass
-            
-            # 提取新Cookie
-            new_cookies = context.cookies()
-            new_cookie_str = '; '.join([f'{c["name"]}={c["value"]}' for c in new_cookies])
-            
-            # 关闭浏览器
-            context.close()
-            browser.close()
-            
-            new_cookie_dict = parse_cookie_string(new_cookie_str)
-
-            # 关键校验：必须拿到对应站点的登录态 cookie
-            if new_cookie_str and has_auth_cookie(new_cookie_dict, _module):
-                return {
-                    'success': True,
-                    'cookie_raw': new_cookie_str,
-                    'message': '刷新成功'
-                }
-            else:
-                return {
-                    'success': False,
-                    'cookie_raw': None,
-                    'message': f'Playwright未获取到登录态Cookie（模块: {_module}）'
-                }
-    
+        # 在常驻浏览器中刷新
+        new_cookies = _run_in_browser(_collect_cookies, cookie_list, url)
+        # 每个 Cookie 只取一次 name/value，拼接字符串与构建字典共用
+        # （直接由 Cookie 列表构建字典，不再把拼好的字符串重新解析一遍）
+        pairs = list(map(_COOKIE_NAME_VALUE, new_cookies))
+        new_cookie_str = '; '.join(f'{n}={v}' for n, v in pairs)
+        new_cookie_dict = dict(pairs)
+
+        # 关键校验：必须拿到对应站点的登录态 cookie
+        if new_cookie_str and has_auth_cookie(new_cookie_dict, _module):
+            return {
+                'success': True,
+                'cookie_raw': new_cookie_str,
+                'cookie_list': new_cookies,
+                'message': '刷新成功'
+            }
+        else:
+            return {
+                'success': False,
+                'cookie_raw': None,
+                'message': f'Playwright未获取到登录态Cookie（模块: {_module}）'
+            }
+
     except Exception as e:
         return {
             'success': False,
@@ -294,7 +379,6 @@ def refresh_cookie_with_playwright(site, config):
         }
 
 
-
 def verify_cookie_validity(site, config):
     """
     验证Cookie是否有效
@@ -313,10 +397,6 @@ def verify_cookie_validity(site, config):
         }
     """
     try:
-        import requests
-        from . import get_user_agent
-        
-        from modules.sites import SITE_REGISTRY
         _module = site.get('module', '')
         _fallback_url = (SITE_REGISTRY.get(_module) or {}).get('base_url', '')
         base_url = site.get('base_url') or _fallback_url
@@ -341,8 +421,8 @@ def verify_cookie_validity(site, config):
                 'message': '缺少登录态Cookie'
             }
         
-        # 创建会话
-        session = requests.Session()
+        # 创建会话（挂载共享连接池，重复验证同一站点时复用已建立的连接；Cookie 仍按会话隔离）
+        session = new_session()
         session.cookies.update(cookies)
         session.headers.update({
             'User-Agent': get_user_agent(config)
@@ -368,17 +448,19 @@ def verify_cookie_validity(site, config):
         }
 
 
-def calculate_next_refresh_time(cookie_dict):
+def calculate_next_refresh_time(cookie_dict, analysis=None):
     """
     计算下一次刷新时间：Cookie有效期结束后2分钟
     
     Args:
         cookie_dict: Cookie字典
+        analysis: 已有的 analyze_cookie_validity 结果（可选，避免重复扫描Cookie）
         
     Returns:
         datetime.datetime: 下次刷新的时间
     """
-    analysis = analyze_cookie_validity(cookie_dict)
+    if analysis is None:
+        analysis = analyze_cookie_validity(cookie_dict)
 
     # 无时间戳或已过期时，尽快触发保活，避免等待过久
     if not analysis['valid']:
@@ -420,29 +502,39 @@ def keepalive_task(site, config):
     _module = site.get('module', '')
     
     steps = []
+    now = datetime.datetime.now()
     
     print(f"\n{'='*60}")
-    print(f"[Cookie保活] {name} - {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"[Cookie保活] {name} - {now.strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"{'='*60}")
     
     # ==================== 步骤1: 分析当前Cookie ====================
     cookie_dict = parse_cookie_string(cookie_raw)
-    analysis = analyze_cookie_validity(cookie_dict)
     
     print(f"\n[步骤1] 分析当前Cookie有效期")
-    if analysis['valid']:
-        print(f"  状态: ✅ 有效")
-        print(f"  最新参数: {analysis['max_key']}")
-        print(f"  剩余时间: {analysis['remaining_hours']:.1f} 小时")
-        print(f"  过期时间: {analysis['expires_at']}")
-        steps.append(f"Cookie有效，剩余{analysis['remaining_hours']:.1f}小时")
+    if not has_auth_cookie(cookie_dict, _module):
+        # 缺少登录态Cookie时时间戳没有意义，跳过逐项扫描，直接按过期处理
+        analysis = None
+        print(f"  状态: ❌ 缺少登录态Cookie")
+        steps.append("缺少登录态Cookie，立即刷新")
     else:
-        print(f"  状态: ❌ 已过期")
-        print(f"  过期于: {analysis['expires_at']}")
-        steps.append(f"Cookie已过期，立即刷新")
+        analysis = analyze_cookie_validity(cookie_dict)
+        if analysis['valid']:
+            print(f"  状态: ✅ 有效")
+            print(f"  最新参数: {analysis['max_key']}")
+            print(f"  剩余时间: {analysis['remaining_hours']:.1f} 小时")
+            print(f"  过期时间: {analysis['expires_at']}")
+            steps.append(f"Cookie有效，剩余{analysis['remaining_hours']:.1f}小时")
+        else:
+            print(f"  状态: ❌ 已过期")
+            print(f"  过期于: {analysis['expires_at']}")
+            steps.append(f"Cookie已过期，立即刷新")
     
     # ==================== 步骤2: 计算下次执行时间 ====================
-    next_exec_time = calculate_next_refresh_time(cookie_dict)
+    if analysis is None:
+        next_exec_time = now + datetime.timedelta(minutes=2)
+    else:
+        next_exec_time = calculate_next_refresh_time(cookie_dict, analysis)
     print(f"\n[步骤2] 计算下次执行时间")
     print(f"  预定时间: {next_exec_time.strftime('%Y-%m-%d %H:%M:%S')}")
     steps.append(f"下次执行时间: {next_exec_time.strftime('%H:%M:%S')}")
@@ -458,8 +550,8 @@ def keepalive_task(site, config):
         cookie_raw = playwright_result['cookie_raw']
         site['cookie'] = cookie_raw
         
-        # 重新计算下次执行时间
-        cookie_dict = parse_cookie_string(cookie_raw)
+        # 重新计算下次执行时间（直接使用 Playwright 返回的 Cookie 列表）
+        cookie_dict = dict(map(_COOKIE_NAME_VALUE, playwright_result['cookie_list']))
         next_exec_time = calculate_next_refresh_time(cookie_dict)
         
         steps.append(f"Playwright刷新成功，新Cookie：{len(cookie_raw)} characters")
@@ -476,9 +568,6 @@ def keepalive_task(site, config):
             
             # 保存新Cookie到config
             try:
-                from . import cookie_sync
-                from . import cookie_metadata
-                
                 # 重新加载config
                 config_result = cookie_sync.load_config()
                 if config_result and config_result[0]:
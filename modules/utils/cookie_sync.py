@@ -3,17 +3,41 @@
 Config 读写工具
 提供配置文件的线程安全加载和保存功能
 """
+import copy
 import os
 import tempfile
 import threading
 import yaml
 
+# 优先使用 libyaml 的 C 实现（PyYAML 编译时带 libyaml 才可用），否则回退到纯 Python 实现
+try:
+    from yaml import CSafeLoader as _SafeLoader, CSafeDumper as _SafeDumper
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader, SafeDumper as _SafeDumper
+
+# 仅保护写入（save_config），load_config 读取不加锁
 _config_write_lock = threading.Lock()
 
+# 解析结果缓存：{绝对路径: ((st_mtime_ns, st_size), config, encoding)}
+# 文件未变化时返回深拷贝，调用方可以随意修改后再 save_config
+_config_cache = {}
+
+
+def _file_signature(config_path):
+    """文件签名（修改时间 + 大小），文件不存在时返回 None"""
+    try:
+        st = os.stat(config_path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
 
 def load_config(config_path='config/config.yaml'):
     """
-    加载配置文件，使用全局锁保护读操作。
+    加载配置文件。
+
+    读取不加锁：save_config 通过临时文件 + os.replace 原子替换，读取方只会看到完整的旧文件或新文件。
+    文件自上次读取/保存后未变化时直接返回缓存的副本，避免重复解析 YAML。
 
     Args:
         config_path: 配置文件路径
@@ -21,15 +45,22 @@ def load_config(config_path='config/config.yaml'):
     Returns:
         (config_dict, encoding): 配置字典和文件编码
     """
-    with _config_write_lock:
-        for enc in ['utf-8', 'gbk']:
-            try:
-                with open(config_path, 'r', encoding=enc) as f:
-                    config = yaml.safe_load(f)
-                    return config, enc
-            except:
-                continue
-        return None, None
+    key = os.path.abspath(config_path)
+    signature = _file_signature(config_path)
+    cached = _config_cache.get(key)
+    if signature is not None and cached and cached[0] == signature:
+        return copy.deepcopy(cached[1]), cached[2]
+    
+    for enc in ['utf-8', 'gbk']:
+        try:
+            with open(config_path, 'r', encoding=enc) as f:
+                config = yaml.load(f, Loader=_SafeLoader)
+            if signature is not None:
+                _config_cache[key] = (signature, copy.deepcopy(config), enc)
+            return config, enc
+        except:
+            continue
+    return None, None
 
 
 def save_config(config, config_path='config/config.yaml', encoding='utf-8'):
@@ -47,18 +78,26 @@ def save_config(config, config_path='config/config.yaml', encoding='utf-8'):
             temp_fd, temp_path = tempfile.mkstemp(dir=config_dir, text=True, suffix='.tmp')
             try:
                 with os.fdopen(temp_fd, 'w', encoding=encoding) as temp_file:
-                    yaml.safe_dump(
+                    yaml.dump(
                         config,
                         temp_file,
+                        Dumper=_SafeDumper,
                         allow_unicode=True,
                         default_flow_style=False,
                         sort_keys=False,
                         width=4096
                     )
-                if os.path.exists(config_path):
-                    os.replace(temp_path, config_path)
-                else:
-                    os.rename(temp_path, config_path)
+                    # 重命名前落盘，避免崩溃后留下不完整的配置文件
+                    temp_file.flush()
+                    os.fsync(temp_file.fileno())
+                # os.replace 在目标不存在时同样适用，且在各平台上都是原子替换
+                os.replace(temp_path, config_path)
+                # 刚写入的内容即为最新配置，直接更新缓存，下次读取无需重新解析
+                signature = _file_signature(config_path)
+                if signature is not None:
+                    _config_cache[os.path.abspath(config_path)] = (
+                        signature, copy.deepcopy(config), encoding
+                    )
             except Exception as write_error:
                 try:
                     os.unlink(temp_path)
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP 会话工具 - 签到模块共享的连接池
+"""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 网关类错误（502/503/504）与连接失败自动重试；
+# 默认只重试幂等方法，签到 POST 不会被重复提交
+_RETRY = Retry(
+    total=2,
+    backoff_factor=0.3,
+    status_forcelist=(502, 503, 504),
+    raise_on_status=False,  # 重试用尽后返回最后一次响应，由站点模块按状态码处理
+)
+
+# 所有站点模块的会话挂载同一个连接池适配器：
+# Cookie 仍按会话隔离，而到同一主机的 TCP/TLS 连接可以跨请求、跨次签到、跨站点模块复用
+_SHARED_ADAPTER = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=_RETRY)
+
+
+def new_session():
+    """
+    创建挂载共享连接池的 requests.Session
+
+    Returns:
+        requests.Session: 独立 Cookie 的新会话
+    """
+    session = requests.Session()
+    session.mount('https://', _SHARED_ADAPTER)
+    session.mount('http://', _SHARED_ADAPTER)
+    return session
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 编解码 - 优先使用 orjson（可选依赖），未安装时回退到标准库
+
+loads() 可直接接收响应的原始 bytes（resp.content），省去先解码为 str 的开销；
+解析失败（包括非 UTF-8 编码的 bytes）统一抛出 JSONDecodeError。
+"""
+import json
+
+# orjson.JSONDecodeError 是 json.JSONDecodeError 的子类，两种实现统一捕获此异常
+JSONDecodeError = json.JSONDecodeError
+
+try:
+    import orjson
+
+    def loads(data):
+        return orjson.loads(data)
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def loads(data):
+        try:
+            return json.loads(data)
+        except UnicodeDecodeError as e:
+            # 标准库对非 UTF-8 的 bytes（如 GBK 页面）抛出 UnicodeDecodeError，与 orjson 保持一致
+            raise JSONDecodeError(f"无法按 UTF-8 解码: {e.reason}", "", e.start) from e
+
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
@@ -2,10 +2,27 @@
 """
 通知推送模块 - 支持多种推送服务（Bark、Telegram、企业微信等）
 """
+import queue
 import requests
+import threading
 import time
 from datetime import datetime
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
 from .. import safe_print
+from .json_compat import dumps as _dumps
+
+# Bark 推送共享会话：复用 TCP/TLS 连接，避免每次推送重新握手
+# （重试由 push_bark 自身控制，这里不再挂载 Retry）
+_bark_session = requests.Session()
+_bark_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_bark_session.headers['Content-Type'] = 'application/json; charset=utf-8'
+
+
+@lru_cache(maxsize=8)
+def _bark_url(api_key):
+    """Bark 推送地址（按密钥缓存）"""
+    return f"https://api.day.app/{api_key}"
 
 
 def push_bark(bark_config, site_name, result_msg):
@@ -43,7 +60,8 @@ def push_bark(bark_config, site_name, result_msg):
     if url_param:
         payload['url'] = url_param
     
-    url = f"https://api.day.app/{api_key}"
+    url = _bark_url(api_key)
+    body = _dumps(payload)  # 只序列化一次，重试时复用
 
     # 失败重试：最多2次（总计3次）
     max_retries = int(bark_config.get('max_retries', 2))
@@ -51,7 +69,7 @@ def push_bark(bark_config, site_name, result_msg):
 
     for attempt in range(max_retries + 1):
         try:
-            response = requests.post(url, json=payload, timeout=10)
+            response = _bark_session.post(url, data=body, timeout=10)
             if response.status_code == 200:
                 safe_print(f"[通知] 已发送 Bark 推送: {site_name} - {result_msg}")
                 return
@@ -64,45 +82,119 @@ def push_bark(bark_config, site_name, result_msg):
             safe_print(f"[通知] Bark 推送失败: {e}")
 
 
-def push_notification(config, site_name, result_msg):
+# 推送服务分发表：config['notify'] 中的键 → 推送函数
+_DISPATCH = {
+    'bark': push_bark,
+}
+
+
+# 推送队列：推送请求由后台线程发送，调用方无需等待 HTTP 完成（含重试最长约 30 秒）
+_NOTIFY_QUEUE = queue.Queue(maxsize=1024)
+_notify_worker = None
+_notify_worker_lock = threading.Lock()
+# 关闭服务时等待推送队列清空的最长秒数
+NOTIFY_FLUSH_TIMEOUT = 20
+
+
+def _iter_services(notify_config):
     """
-    统一推送入口，支持多种推送服务
+    遍历已启用的推送服务，产出 (推送函数, 服务配置)
 
     config['notify'] 支持两种格式：
       - 字典格式（当前默认）: {bark: {...}, telegram: {...}}
       - 列表格式（旧版）:     [{bark: {...}}, {telegram: {...}}]
+    """
+    # 兼容列表格式（旧版）：逐项展开为字典
+    if isinstance(notify_config, list):
+        items = [item for item in notify_config if isinstance(item, dict)]
+    elif isinstance(notify_config, dict):
+        items = [notify_config]
+    else:
+        return
+
+    for item in items:
+        for kind, cfg in item.items():
+            push_func = _DISPATCH.get(kind)
+            if push_func and isinstance(cfg, dict) and cfg.get('enabled', False):
+                yield push_func, cfg
+
+
+def _dispatch_notification(services, site_name, result_msg):
+    """按服务列表同步发送推送（在后台线程中调用）"""
+    for push_func, cfg in services:
+        push_func(cfg, site_name, result_msg)
+
+
+def _notify_loop():
+    """推送线程主循环，收到 None 时退出"""
+    while True:
+        item = _NOTIFY_QUEUE.get()
+        try:
+            if item is None:
+                return
+            _dispatch_notification(*item)
+        except Exception as e:
+            safe_print(f"[通知] 推送异常: {e}")
+        finally:
+            _NOTIFY_QUEUE.task_done()
+
+
+def _ensure_notify_worker():
+    """按需启动推送线程（只启动一次）"""
+    global _notify_worker
+    with _notify_worker_lock:
+        if _notify_worker is None or not _notify_worker.is_alive():
+            _notify_worker = threading.Thread(
+                target=_notify_loop,
+                daemon=True,
+                name="Notifier"
+            )
+            _notify_worker.start()
+
+
+def push_notification(config, site_name, result_msg):
+    """
+    统一推送入口：将推送放入队列后立即返回，由后台线程发送
+
+    未启用任何推送服务时直接返回；队列已满时丢弃本条推送并打印提示。
 
     Args:
         config: 全局配置字典
         site_name: 站点名称
         result_msg: 结果消息
     """
-    notify_config = config.get('notify', {})
-
-    # 兼容列表格式（旧版）
-    if isinstance(notify_config, list):
-        for notify_item in notify_config:
-            if isinstance(notify_item, dict):
-                bark_cfg = notify_item.get('bark')
-                if isinstance(bark_cfg, dict):
-                    push_bark(bark_cfg, site_name, result_msg)
+    services = list(_iter_services(config.get('notify', {})))
+    if not services:
         return
 
-    # 字典格式（当前默认）
-    if not isinstance(notify_config, dict):
-        return
+    _ensure_notify_worker()
+    try:
+        _NOTIFY_QUEUE.put_nowait((services, site_name, result_msg))
+    except queue.Full:
+        safe_print(f"[通知] 推送队列已满，丢弃通知: {site_name}")
+
 
-    # Bark 推送
-    bark_cfg = notify_config.get('bark')
-    if isinstance(bark_cfg, dict):
-        push_bark(bark_cfg, site_name, result_msg)
+def flush_notifications(timeout=NOTIFY_FLUSH_TIMEOUT):
+    """
+    等待队列中的推送发送完毕，然后停止推送线程（服务关闭时调用）
 
-    # Telegram 推送（预留）
-    # telegram_cfg = notify_config.get('telegram')
-    # if isinstance(telegram_cfg, dict):
-    #     push_telegram(telegram_cfg, site_name, result_msg)
+    最多等待 timeout 秒；超时后不再等待，剩余推送随守护线程在进程退出时丢弃。
 
-    # 企业微信推送（预留）
-    # wechat_cfg = notify_config.get('wechat')
-    # if isinstance(wechat_cfg, dict):
-    #     push_wechat(wechat_cfg, site_name, result_msg)
+    Returns:
+        bool: 是否在超时前全部发送完毕
+    """
+    worker = _notify_worker
+    if worker is None or not worker.is_alive():
+        return True
+    deadline = time.monotonic() + timeout
+    try:
+        _NOTIFY_QUEUE.put(None, timeout=timeout)
+    except queue.Full:
+        safe_print("[通知] 推送队列已满，等待发送超时")
+        return False
+    # 推送线程处理完停止标记后退出，等待线程结束即等待队列清空
+    worker.join(max(0, deadline - time.monotonic()))
+    if worker.is_alive():
+        safe_print(f"[通知] 等待推送发送超时，约 {_NOTIFY_QUEUE.qsize()} 条未发送")
+        return False
+    return True
@@ -74,9 +74,9 @@ class FetchCookieSession:
         _m = _re.search(r'Chrome/(\d+)', _ua)
         _chrome_ver = _m.group(1) if _m else '144'
 
-        from playwright.async_api import async_playwright
+        from modules.core.playwright_manager import get_playwright
 
-        self._playwright = await async_playwright().start()
+        self._playwright = await get_playwright()
         self._browser = await self._playwright.chromium.launch(
             headless=True,
             args=[
@@ -214,10 +214,10 @@ class FetchCookieSession:
     async def close(self) -> None:
         """释放所有浏览器资源。"""
         self.status = 'closed'
+        # Playwright 驱动为进程共享，这里不停止，只关闭本会话的浏览器
         for obj, method in [
             (self._context, 'close'),
             (self._browser, 'close'),
-            (self._playwright, 'stop'),
         ]:
             if obj:
                 try:
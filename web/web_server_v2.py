@@ -19,6 +19,7 @@ import sys
 import asyncio
 import threading
 import json
+from itertools import chain
 from pathlib import Path
 from datetime import datetime, timedelta
 from functools import wraps
@@ -407,8 +408,7 @@ class AppContext:
         """为今日所有启用站点生成签到任务（跳过今日已签到成功的站点）"""
         import random as _random
         from modules.utils.cookie_sync import load_config as _load_cfg
-        from modules.core.task_scheduler import Task, TaskType
-        import uuid
+        from modules.core.task_scheduler import Task, TaskType, parse_run_time
 
         try:
             full_config, _ = _load_cfg('config/config.yaml')
@@ -444,11 +444,7 @@ class AppContext:
                     pass
 
             # 解析 run_time
-            run_time_str = site.get('run_time', '09:00:00')
-            try:
-                run_time = datetime.strptime(run_time_str, '%H:%M:%S').time()
-            except ValueError:
-                run_time = datetime.strptime('09:00:00', '%H:%M:%S').time()
+            run_time = parse_run_time(site.get('run_time', '09:00:00')) or parse_run_time('09:00:00')
 
             # 计划时间 = 今天的 run_time + 随机延迟
             scheduled = datetime.combine(today, run_time)
@@ -467,14 +463,14 @@ class AppContext:
             # 避免向 pending 队列重复添加同一站点的签到任务
             already_pending = any(
                 t.site_name == site_name and t.task_type.value == 'sign'
-                for t in self.task_scheduler.pending_tasks
+                for t in self.task_scheduler.iter_pending_tasks()
             )
             if already_pending:
                 logger.debug(f"[SignScheduler] {site_name} 已在待执行队列中，跳过")
                 continue
 
             task = Task(
-                task_id=f"sign_{uuid.uuid4().hex[:8]}",
+                task_id=self.task_scheduler.new_task_id(),
                 site_name=site_name,
                 task_type=TaskType.SIGN,
                 scheduled_time=scheduled,
@@ -501,10 +497,10 @@ class AppContext:
         # 获取到期的签到任务（含重试队列）
         due_tasks = self.task_scheduler.get_executable_tasks(now)
         retry_tasks = self.task_scheduler.get_executable_retry_tasks(now)
-        all_due = [t for t in (due_tasks + retry_tasks) if t.task_type.value == 'sign']
+        all_due = [t for t in chain(due_tasks, retry_tasks) if t.task_type == TaskType.SIGN]
 
         for task in all_due:
-            self.task_scheduler.start_task(task)
+            self.task_scheduler.start_task(task, now)
 
             def _do_sign(t=task):
                 _sites_cfg = load_sites_config()
@@ -1166,8 +1162,10 @@ def get_sites():
     """获取所有网站的签到状态"""
     try:
         from datetime import datetime, time, timedelta
+        from modules.core.task_scheduler import parse_run_time
         
         sites_config = load_sites_config()
+        now = datetime.now()
         
         sites_list = []
         for site_name, site_cfg in sites_config.items():
@@ -1182,15 +1180,13 @@ def get_sites():
                 credential_type = 'none'
             
             # 计算下次签到时间
-            run_time_str = site_cfg.get('run_time', '09:00:00')
-            try:
-                run_time = datetime.strptime(run_time_str, '%H:%M:%S').time()
-                now = datetime.now()
+            run_time = parse_run_time(site_cfg.get('run_time', '09:00:00'))
+            if run_time is not None:
                 scheduled = datetime.combine(now.date(), run_time)
                 if scheduled <= now:
                     scheduled = datetime.combine(now.date() + timedelta(days=1), run_time)
                 next_sign_time = scheduled.isoformat()
-            except:
+            else:
                 next_sign_time = None
             
             site_info = {
@@ -1773,7 +1769,7 @@ def execute_sign(site_name):
         # 在后台线程中执行签到
         def run_sign():
             from modules.core.task_scheduler import Task, TaskType
-            import uuid, asyncio as aio, time as _time
+            import asyncio as aio, time as _time
             task = None
             try:
                 safe_print(f"\n[run_sign] 开始执行: {site_name}")
@@ -1792,7 +1788,7 @@ def execute_sign(site_name):
 
                 # 创建任务并注册到调度器（使其出现在 running_site_names）
                 task = Task(
-                    task_id=str(uuid.uuid4()),
+                    task_id=ctx.task_scheduler.new_task_id(),
                     site_name=site_name,
                     task_type=TaskType.SIGN,
                     scheduled_time=datetime.now(),
@@ -2084,6 +2080,13 @@ def start_server(host='0.0.0.0', port=21333, debug=False):
         # 预初始化异步循环
         get_async_loop()
 
+        # 预加载所有签到模块，避免首次签到时的导入延迟
+        try:
+            from modules.sites import SITE_REGISTRY
+            run_async(ctx.sign_executor.preload(SITE_REGISTRY.keys()), timeout=60)
+        except Exception as e:
+            logger.warning(f"预加载签到模块失败: {e}")
+
         # 启动保活后台调度线程
         ctx.start_keepalive_scheduler()
 
@@ -2102,9 +2105,19 @@ def stop_server():
     try:
         if ctx.credential_manager:
             run_async(ctx.credential_manager.cleanup_browser())
-        logger.info("Web服务已关闭")
+        # 等待排队中的签到通知发送完毕（flush_notifications 自身最多等待 NOTIFY_FLUSH_TIMEOUT 秒）
+        from modules.utils.notify import NOTIFY_FLUSH_TIMEOUT
+        run_async(ctx.sign_executor.aclose(), timeout=NOTIFY_FLUSH_TIMEOUT + 5)
     except Exception as e:
         logger.error(f"关闭服务异常: {str(e)}")
+    finally:
+        # 共享的 Playwright 驱动单独停止，不受通知发送是否超时影响
+        try:
+            from modules.core.playwright_manager import stop_playwright
+            run_async(stop_playwright())
+        except Exception as e:
+            logger.error(f"停止 Playwright 驱动失败: {str(e)}")
+    logger.info("Web服务已关闭")
 
 
 if __name__ == '__main__':